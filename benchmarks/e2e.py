@@ -0,0 +1,146 @@
+"""
+End-to-end throughput/latency benchmark without live services.
+
+Runs RouterWorkflow (and NriyV1Workflow for command messages) on a local
+Temporal dev server (temporalio.testing.WorkflowEnvironment.start_local,
+downloaded on first use) against the fake PocketBase, Naver and OpenAI
+servers in benchmarks/fakes.py, then reports p50/p95/p99 latency per
+activity and end to end, plus messages per second.
+
+A share of the command messages (--profane-ratio) contain profanity:
+half of them a word the local lexicon decides (씨발), half a homograph
+it escalates to the (fake) LLM (시발), so both profanity paths run.
+
+Usage:
+    python -m benchmarks.e2e --messages 200 --concurrency 20 \\
+        --command-ratio 0.3 --profane-ratio 0.2 --openai-latency lognormal:400,0.5
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from collections import defaultdict
+from typing import Dict, List
+
+from benchmarks.fakes import PROFANE_WORDS, Latency, create_naver_app, create_openai_app, create_pocketbase_app, serve, stop
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def print_report(samples: Dict[str, List[float]], elapsed: float, messages: int) -> None:
+    print(f"{'stage':<28}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage in sorted(samples):
+        values = samples[stage]
+        print(
+            f"{stage:<28}{len(values):>8}"
+            f"{percentile(values, 50) * 1000:>10.1f}"
+            f"{percentile(values, 95) * 1000:>10.1f}"
+            f"{percentile(values, 99) * 1000:>10.1f}"
+        )
+    print(f"\n{messages} messages in {elapsed:.2f}s: {messages / elapsed:.1f} messages/s")
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100, help="number of chat messages")
+    parser.add_argument("--concurrency", type=int, default=10, help="messages in flight at once")
+    parser.add_argument("--chats", type=int, default=5, help="number of distinct chats")
+    parser.add_argument("--command-ratio", type=float, default=0.3, help="fraction of messages starting with '/'")
+    parser.add_argument("--profane-ratio", type=float, default=0.1, help="fraction of command messages with profanity")
+    parser.add_argument("--pocketbase-latency", default="lognormal:5,0.3", help="latency spec (see fakes.Latency)")
+    parser.add_argument("--naver-latency", default="lognormal:80,0.4")
+    parser.add_argument("--openai-latency", default="lognormal:400,0.5")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+async def main(args: argparse.Namespace) -> None:
+    random.seed(args.seed)
+
+    servers = [
+        await serve(create_pocketbase_app(Latency(args.pocketbase_latency))),
+        await serve(create_naver_app(Latency(args.naver_latency))),
+        await serve(create_openai_app(Latency(args.openai_latency))),
+    ]
+    pocketbase_url, naver_url, openai_url = (url for _, _, url in servers)
+
+    # Module-level settings are read at import time, so configure first
+    os.environ["POCKETBASE_URL"] = pocketbase_url
+    os.environ["NAVER_API_URL"] = naver_url
+    os.environ["OPENAI_BASE_URL"] = os.environ["OPENAI_API_BASE"] = f"{openai_url}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ.setdefault("NAVER_CLIENT_ID", "benchmark")
+    os.environ.setdefault("NAVER_CLIENT_SECRET", "benchmark")
+
+    from temporalio import activity, worker as temporal_worker
+    from temporalio import client as temporal_client
+    from temporalio.client import Client
+    from temporalio.testing import WorkflowEnvironment
+    from tpr_nriy.workers.nriy import create_worker
+
+    samples: Dict[str, List[float]] = defaultdict(list)
+
+    class StageTimer(temporal_client.Interceptor, temporal_worker.Interceptor):
+        """Times every activity execution (local and remote) by activity type."""
+
+        def intercept_activity(self, next):
+            class Inbound(temporal_worker.ActivityInboundInterceptor):
+                async def execute_activity(self, input):
+                    start = time.perf_counter()
+                    try:
+                        return await super().execute_activity(input)
+                    finally:
+                        samples[f"activity:{activity.info().activity_type}"].append(time.perf_counter() - start)
+            return Inbound(next)
+
+    async with await WorkflowEnvironment.start_local() as env:
+        client = Client(**{**env.client.config(), "interceptors": [StageTimer()]})
+        worker = await create_worker(client)
+        worker_task = asyncio.create_task(worker.run())
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def send(i: int) -> None:
+            is_command = random.random() < args.command_ratio
+            is_profane = is_command and random.random() < args.profane_ratio
+            if is_profane:
+                content = f"/{PROFANE_WORDS[i % len(PROFANE_WORDS)]} 뉴스 알려줘 {i}"
+            elif is_command:
+                content = f"/오늘 뉴스 알려줘 {i}"
+            else:
+                content = f"그냥 하는 말 {i}"
+            input = {
+                "logId": f"bench-{i}-{uuid.uuid4().hex[:8]}",
+                "channelId": f"chat-{i % args.chats}",
+                "room": "benchmark",
+                "author": {"name": f"user-{i % 7}"},
+                "content": content
+            }
+            async with semaphore:
+                start = time.perf_counter()
+                await client.execute_workflow(
+                    "RouterWorkflow",
+                    json.dumps(input),
+                    id=f"bench-router-{input['logId']}",
+                    task_queue="nriy"
+                )
+                elapsed = time.perf_counter() - start
+            samples["e2e:all"].append(elapsed)
+            samples["e2e:profane" if is_profane else "e2e:command" if is_command else "e2e:no_reply"].append(elapsed)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(send(i) for i in range(args.messages)))
+        elapsed = time.perf_counter() - start
+
+        await worker.shutdown()
+        await worker_task
+
+    await stop(servers)
+    print_report(samples, elapsed, args.messages)
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args(sys.argv[1:])))
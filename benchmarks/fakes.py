@@ -0,0 +1,204 @@
+"""
+Local stand-ins for PocketBase, the Naver search API and an
+OpenAI-compatible chat completions API, with configurable latency.
+"""
+import re
+import json
+import math
+import time
+import random
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+
+class Latency:
+    """
+    Latency distribution parsed from a spec string.
+
+    Specs:
+        const:MS            fixed latency
+        uniform:MIN,MAX     uniform between MIN and MAX ms
+        lognormal:MEDIAN,SIGMA  log-normal with the given median (ms) and sigma
+    """
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        values = [float(value) for value in params.split(",") if value]
+        if kind == "const" and len(values) == 1:
+            self._sample = lambda: values[0]
+        elif kind == "uniform" and len(values) == 2:
+            self._sample = lambda: random.uniform(values[0], values[1])
+        elif kind == "lognormal" and len(values) == 2:
+            mu = math.log(values[0])
+            self._sample = lambda: random.lognormvariate(mu, values[1])
+        else:
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+    async def sleep(self) -> None:
+        await asyncio.sleep(max(self._sample(), 0) / 1000)
+
+def create_pocketbase_app(latency: Latency) -> FastAPI:
+    """In-memory PocketBase supporting the calls made by PocketBaseClient."""
+    app = FastAPI()
+    collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def store(collection: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        records = collections.setdefault(collection, {})
+        record_id = data.get("id") or f"r{len(records):014d}"
+        record = {**records.get(record_id, {}), **data, "id": record_id}
+        record.setdefault("created", datetime.now(timezone.utc).isoformat())
+        records[record_id] = record
+        return record
+
+    @app.post("/api/collections/{collection}/records")
+    @app.put("/api/collections/{collection}/records")
+    async def upsert(collection: str, request: Request):
+        await latency.sleep()
+        return store(collection, await request.json())
+
+    @app.get("/api/collections/{collection}/records")
+    async def list_records(collection: str, request: Request):
+        await latency.sleep()
+        params = request.query_params
+        records = list(collections.get(collection, {}).values())
+
+        query = params.get("filter", "")
+        ids = re.findall(r"id = '([^']*)'", query)
+        chat_id = re.search(r"chat_id = '([^']*)'", query)
+        if ids:
+            records = [record for record in records if record["id"] in ids]
+        if chat_id:
+            records = [record for record in records if record.get("chat_id") == chat_id.group(1)]
+        if params.get("sort") == "-created":
+            records.sort(key=lambda record: record["created"], reverse=True)
+
+        per_page = int(params.get("perPage", "30"))
+        return {"items": records[:per_page], "totalItems": len(records)}
+
+    @app.get("/api/collections/{collection}/records/{record_id}")
+    async def get_record(collection: str, record_id: str):
+        await latency.sleep()
+        record = collections.get(collection, {}).get(record_id)
+        if record is None:
+            raise HTTPException(status_code=404)
+        return record
+
+    return app
+
+def create_naver_app(latency: Latency, items: int = 20) -> FastAPI:
+    """Naver search API returning `items` synthetic results."""
+    app = FastAPI()
+
+    @app.get("/v1/search/{type}.json")
+    async def search(type: str, query: str, display: int = 10):
+        await latency.sleep()
+        return {
+            "items": [
+                {
+                    "title": f"<b>{query}</b> {type} 결과 {i}",
+                    "description": f"{query}에 대한 {type} 검색 결과 설명 {i} &amp; 기타 내용"
+                }
+                for i in range(min(display, items))
+            ]
+        }
+
+    return app
+
+def _fake_value(schema: Dict[str, Any]) -> Any:
+    kind = schema.get("type")
+    if kind == "boolean":
+        return True
+    if kind in ("integer", "number"):
+        return 0
+    if kind == "array":
+        return []
+    if kind == "object":
+        return {name: _fake_value(prop) for name, prop in schema.get("properties", {}).items()}
+    return "테스트"
+
+# Words that make the fake LLM report profanity
+PROFANE_WORDS = ("시발", "씨발")
+
+def _fake_arguments(schema: Dict[str, Any], profane: bool) -> Dict[str, Any]:
+    arguments = _fake_value(schema)
+    # Only stop the pipeline at the profanity check for profane prompts
+    if "uses_profanity" in arguments:
+        arguments["uses_profanity"] = profane
+    return arguments
+
+def create_openai_app(latency: Latency) -> FastAPI:
+    """
+    OpenAI-compatible /v1/chat/completions.
+
+    Structured-output requests (tools or json_schema response_format) get
+    arguments synthesized from the schema, with uses_profanity set when the
+    prompt contains one of PROFANE_WORDS; plain requests get a short reply.
+    """
+    app = FastAPI()
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await latency.sleep()
+
+        message: Dict[str, Any] = {"role": "assistant", "content": None}
+        finish_reason = "stop"
+        profane = any(word in str(m.get("content", "")) for m in body.get("messages", []) for word in PROFANE_WORDS)
+        response_format = body.get("response_format") or {}
+        if body.get("tools"):
+            function = body["tools"][0]["function"]
+            message["tool_calls"] = [{
+                "id": "call_0",
+                "type": "function",
+                "function": {
+                    "name": function["name"],
+                    "arguments": json.dumps(_fake_arguments(function.get("parameters", {}), profane), ensure_ascii=False)
+                }
+            }]
+            finish_reason = "tool_calls"
+        elif response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"].get("schema", {})
+            message["content"] = json.dumps(_fake_arguments(schema, profane), ensure_ascii=False)
+        else:
+            message["content"] = "황공하옵니다. 벤치마크 응답이옵니다."
+
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in body.get("messages", []))
+        return {
+            "id": "chatcmpl-benchmark",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4.1-nano"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_chars // 4,
+                "completion_tokens": 20,
+                "total_tokens": prompt_chars // 4 + 20
+            }
+        }
+
+    return app
+
+async def serve(app: FastAPI) -> tuple[uvicorn.Server, asyncio.Task, str]:
+    """
+    Serves an app on a random local port.
+
+    Returns:
+        tuple: (server, serving task, base URL)
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, task, f"http://127.0.0.1:{port}"
+
+async def stop(servers: List[tuple]) -> None:
+    for server, task, _ in servers:
+        server.should_exit = True
+    await asyncio.gather(*(task for _, task, _ in servers), return_exceptions=True)
@@ -0,0 +1,51 @@
+"""
+Micro-benchmark of the per-call setup cost of the LLM activities.
+
+Compares building ChatOpenAI + ChatPromptTemplate + with_structured_output
+on every call (the previous behaviour) with the worker-wide cached chain.
+No request is sent to OpenAI; only object construction is measured.
+
+Usage:
+    python -m benchmarks.llm_setup [iterations]
+"""
+import os
+import sys
+import time
+import asyncio
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_openai import ChatOpenAI
+from langchain.prompts import ChatPromptTemplate
+
+from tpr_nriy.activities.analyze_message import MessageAnalysis, MODEL, TEMPERATURE, _build_chain
+from tpr_nriy.common.llm import get_chain
+from tpr_nriy.common.http import close_http_clients
+
+def _build_uncached():
+    llm = ChatOpenAI(model=MODEL, temperature=TEMPERATURE)
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are a message analysis system. Analyze the given message and provide structured information."),
+        ("human", "{message}")
+    ])
+    return prompt | llm.with_structured_output(MessageAnalysis)
+
+def _measure(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+async def main(iterations: int):
+    before = _measure(_build_uncached, iterations)
+    # The first call builds the chain once per worker process; time it apart from the lookups
+    first = _measure(lambda: get_chain(("analyze_message", MODEL, TEMPERATURE), _build_chain), 1)
+    after = _measure(lambda: get_chain(("analyze_message", MODEL, TEMPERATURE), _build_chain), iterations)
+    print(f"iterations: {iterations}")
+    print(f"per-call setup (new objects): {before:10.1f} us")
+    print(f"first call (cache fill):      {first:10.1f} us")
+    print(f"per-call setup (cached):      {after:10.1f} us")
+    await close_http_clients()
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
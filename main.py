@@ -1,11 +1,19 @@
+import time
+# Taken before any other import so the startup report covers the whole cold start
+PROCESS_START = time.perf_counter()
+
+from tpr_nriy.common.config import env_flag
+from tpr_nriy.common.startup import import_third_party, report_startup, set_process_start, timed_import
 import os
-from temporalio.worker import Worker
-from tpr_nriy.workers import get_worker, worker_registry
-from tpr_nriy.trigger.http import app
+import sys
+import signal
+import asyncio
 from tpr_nriy import get_temporal_client
-import uvicorn
 import anyio
 
+# 시작 시 모듈별 import 시간을 출력할지 여부
+STARTUP_REPORT = env_flag("STARTUP_REPORT")
+
 async def run_worker(worker_name: str):
     """
     Run a worker.
@@ -14,11 +22,23 @@ async def run_worker(worker_name: str):
         worker_name: Name of the worker to run
         task_queue_name: Name of the task queue
     """
+    # Workflows and activities (and their LLM libraries) are only imported here
+    import_third_party("worker")
+    from tpr_nriy.workers import get_worker, worker_registry
+    
     try:
         temporal_client = await get_temporal_client()
         # Get worker function
         worker_func = get_worker(worker_name)
-        worker: Worker = await worker_func(temporal_client)
+        worker = await worker_func(temporal_client)
+        
+        # Shut down gracefully on SIGTERM/SIGINT
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, lambda: asyncio.ensure_future(worker.shutdown()))
+        
+        if STARTUP_REPORT:
+            report_startup(f"worker '{worker_name}'")
         
         # Run worker
         print(f"Starting worker '{worker_name}'...")
@@ -27,19 +47,96 @@ async def run_worker(worker_name: str):
         print(f"Error: {e}")
         print(f"Available workers: {', '.join(worker_registry.keys())}")
 
+async def _supervise_worker_process(index: int, stopping: asyncio.Event):
+    """
+    Keeps one worker process running, restarting it when it exits.
+    
+    Args:
+        index: Worker process number
+        stopping: Set when the supervisor is shutting down
+    """
+    restart_delay = float(os.getenv("WORKER_RESTART_DELAY", "1"))
+    max_restart_delay = float(os.getenv("WORKER_MAX_RESTART_DELAY", "30"))
+    shutdown_timeout = float(os.getenv("WORKER_SHUTDOWN_TIMEOUT", "30"))
+    quick_crashes = 0
+    
+    # Children share the supervisor's configuration through the environment
+    env = {**os.environ, "MODE": "worker", "WORKER_PROCESS_INDEX": str(index)}
+    
+    while not stopping.is_set():
+        started_at = time.monotonic()
+        process = await asyncio.create_subprocess_exec(sys.executable, os.path.abspath(__file__), env=env)
+        print(f"Started worker process #{index} (pid: {process.pid})")
+        
+        exit_task = asyncio.create_task(process.wait())
+        stop_task = asyncio.create_task(stopping.wait())
+        await asyncio.wait([exit_task, stop_task], return_when=asyncio.FIRST_COMPLETED)
+        stop_task.cancel()
+        
+        if stopping.is_set():
+            if process.returncode is None:
+                process.terminate()
+                try:
+                    await asyncio.wait_for(exit_task, shutdown_timeout)
+                except asyncio.TimeoutError:
+                    print(f"Worker process #{index} did not stop in {shutdown_timeout}s, killing it")
+                    process.kill()
+                    await exit_task
+            return
+        
+        # Back off when a child keeps crashing right after start: the first
+        # quick crash waits restart_delay, each consecutive one twice as long
+        if time.monotonic() - started_at < max_restart_delay:
+            quick_crashes = min(quick_crashes + 1, 32)
+        else:
+            quick_crashes = 0
+        delay = min(restart_delay * 2 ** max(quick_crashes - 1, 0), max_restart_delay)
+        print(f"Worker process #{index} exited with code {process.returncode}, restarting in {delay:g}s")
+        try:
+            await asyncio.wait_for(stopping.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+async def run_supervisor():
+    """
+    Run N worker processes (WORKER_PROCESSES, default: CPU count) and restart them when they crash.
+    """
+    processes = int(os.getenv("WORKER_PROCESSES", "0")) or os.cpu_count() or 1
+    # Children size process-local state (e.g. the history buffer, the Naver rate limit) by the process count
+    os.environ["WORKER_PROCESSES"] = str(processes)
+    
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stopping.set)
+    
+    print(f"Starting supervisor with {processes} worker processes...")
+    await asyncio.gather(*(_supervise_worker_process(i, stopping) for i in range(processes)))
+    print("Supervisor stopped")
+
 async def run_trigger():
     """
     Run the HTTP trigger.
     """
+    # The trigger only needs FastAPI and the Temporal client
+    import_third_party("trigger")
+    uvicorn = timed_import("uvicorn")
+    app = timed_import("tpr_nriy.trigger.http").app
+    
     host = os.getenv("TRIGGER_HOST", "0.0.0.0")
     port = int(os.getenv("TRIGGER_PORT", "8000"))
     
+    if STARTUP_REPORT:
+        report_startup("trigger")
+    
     print(f"Starting HTTP Trigger... (host: {host}, port: {port})")
     config = uvicorn.Config(app, host=host, port=port)
     server = uvicorn.Server(config)
     await server.serve()
 
 async def main():
+    set_process_start(PROCESS_START)
+
     # Get mode from environment variable
     mode = os.getenv("MODE", "worker")
     
@@ -49,12 +146,15 @@ async def main():
         
         # Run worker
         await run_worker(worker_name)
+    elif mode == "supervisor":
+        # Run worker processes
+        await run_supervisor()
     elif mode == "trigger":
         # Run trigger
         await run_trigger()
     else:
         print(f"Error: Unknown mode '{mode}'")
-        print("Available modes: worker, trigger")
+        print("Available modes: worker, supervisor, trigger")
 
 if __name__ == "__main__":
     anyio.run(main)
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List
+
+import pytest
+from temporalio import activity
+from temporalio.client import Client
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import Worker
+from temporalio.worker.workflow_sandbox import SandboxedWorkflowRunner, SandboxRestrictions
+
+from tpr_nriy.activities import TASK_QUEUE, get_activity_task_queue
+from tpr_nriy.workflows import get_all_workflows
+
+# Messages containing this marker are reported as profane by the fake analyze_message
+PROFANE_MARKER = "<profane>"
+
+def make_input(content: str, chat_id: str = "chat-1", log_id: str | None = None) -> str:
+    """Builds a trigger message (the JSON RouterWorkflow and ChatEntityWorkflow receive)."""
+    return json.dumps({
+        "logId": log_id or uuid.uuid4().hex,
+        "channelId": chat_id,
+        "room": "room",
+        "author": {"name": "user"},
+        "content": content
+    })
+
+class FakeActivities:
+    """Activities standing in for PocketBase, the LLM and search, recording their calls."""
+
+    def __init__(self) -> None:
+        self.calls: List[str] = []
+        self.written: List[Dict[str, Any]] = []
+
+    def all(self) -> Dict[str, List[Callable]]:
+        """Fake activities by the task queue they are served on."""
+        @activity.defn(name="check_response_needed")
+        async def check_response_needed(message: str) -> bool:
+            self.calls.append("check_response_needed")
+            return message.startswith("/")
+
+        @activity.defn(name="add_chat_history")
+        async def add_chat_history(message_id: str, chat_id: str, chat_name: str, user_name: str, message: str) -> str:
+            self.calls.append("add_chat_history")
+            self.written.append({"id": message_id, "user_name": user_name, "message": message})
+            return message_id
+
+        @activity.defn(name="get_chat_history")
+        async def get_chat_history(chat_id: str, limit: int = 15) -> list[dict[str, Any]]:
+            self.calls.append("get_chat_history")
+            return []
+
+        @activity.defn(name="get_chat_summary")
+        async def get_chat_summary(chat_id: str) -> Dict[str, Any]:
+            self.calls.append("get_chat_summary")
+            return {"summary": "", "last_message_id": None}
+
+        @activity.defn(name="analyze_message")
+        async def analyze_message(message: str) -> Dict[str, Any]:
+            self.calls.append("analyze_message")
+            return {"uses_profanity": PROFANE_MARKER in message}
+
+        @activity.defn(name="analyze_context")
+        async def analyze_context(chat_history: str, message: str) -> Dict[str, Any]:
+            self.calls.append("analyze_context")
+            return {"query_string": "", "news_search": False, "blog_search": False, "web_search": False}
+
+        @activity.defn(name="generate_response")
+        async def generate_response(history: str, message: str, contexts: Dict[str, Any]) -> Dict[str, Any]:
+            self.calls.append("generate_response")
+            return {
+                "response": f"reply to {message}",
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "prompt_sections": {}}
+            }
+
+        return {
+            TASK_QUEUE: [check_response_needed, add_chat_history, get_chat_history, get_chat_summary],
+            get_activity_task_queue("llm"): [analyze_message, analyze_context, generate_response],
+        }
+
+def run_with_workers(test: Callable[[Client, FakeActivities], Awaitable[None]]) -> None:
+    """
+    Runs a test against the Temporal test server with the real workflows
+    and fake activities. Skips when the test server cannot be started
+    (it is downloaded on first use).
+    """
+    async def main() -> None:
+        try:
+            env = await WorkflowEnvironment.start_time_skipping()
+        except RuntimeError as e:
+            pytest.skip(f"Temporal test server unavailable: {e}")
+
+        fakes = FakeActivities()
+        async with env:
+            workers = []
+            for task_queue, activities in fakes.all().items():
+                workers.append(Worker(
+                    env.client,
+                    task_queue=task_queue,
+                    activities=activities,
+                    **({
+                        "workflows": list(get_all_workflows().values()),
+                        "workflow_failure_exception_types": [Exception],
+                        "workflow_runner": SandboxedWorkflowRunner(
+                            restrictions=SandboxRestrictions.default.with_passthrough_all_modules()
+                        ),
+                    } if task_queue == TASK_QUEUE else {})
+                ))
+            async with workers[0], workers[1]:
+                await test(env.client, fakes)
+
+    asyncio.run(main())
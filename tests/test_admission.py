@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import pytest
+
+from tpr_nriy.trigger import http as trigger
+from tpr_nriy.trigger.admission import TRIGGER_RETRY_AFTER, AdmissionController, AdmissionRejected
+
+def rejection(coro) -> AdmissionRejected:
+    with pytest.raises(AdmissionRejected) as info:
+        asyncio.run(coro)
+    return info.value
+
+def test_acquire_and_release_slots():
+    async def main():
+        admission = AdmissionController(max_concurrency=2, max_per_chat=0, max_queue=1, queue_timeout=1)
+        await admission.acquire("a")
+        await admission.acquire("b")
+        assert admission._semaphore.locked()
+
+        # A third request waits for a released slot
+        waiter = asyncio.ensure_future(admission.acquire("c"))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        admission.release("a")
+        await waiter
+        assert admission._per_chat == {"b": 1, "c": 1}
+
+        for chat_id in ("b", "c"):
+            admission.release(chat_id)
+        assert admission._per_chat == {}
+        assert not admission._semaphore.locked()
+
+    asyncio.run(main())
+
+def test_per_chat_limit_is_429():
+    async def main():
+        admission = AdmissionController(max_concurrency=0, max_per_chat=2)
+        await admission.acquire("chat")
+        await admission.acquire("chat")
+        # Other chats and messages without a chat are not limited
+        await admission.acquire("other")
+        await admission.acquire(None)
+        await admission.acquire("chat")
+
+    error = rejection(main())
+    assert (error.status_code, error.reason) == (429, "chat_limit")
+
+def test_release_frees_the_chat():
+    async def main():
+        admission = AdmissionController(max_concurrency=0, max_per_chat=1)
+        await admission.acquire("chat")
+        admission.release("chat")
+        await admission.acquire("chat")
+        assert admission._per_chat == {"chat": 1}
+
+    asyncio.run(main())
+
+def test_full_queue_is_503():
+    async def main():
+        admission = AdmissionController(max_concurrency=1, max_per_chat=0, max_queue=1, queue_timeout=1)
+        await admission.acquire()
+        waiter = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0.01)
+        try:
+            await admission.acquire()
+        finally:
+            waiter.cancel()
+
+    error = rejection(main())
+    assert (error.status_code, error.reason) == (503, "queue_full")
+
+def test_queue_timeout_is_503_and_releases_the_chat():
+    admission = AdmissionController(max_concurrency=1, max_per_chat=0, max_queue=1, queue_timeout=0.01)
+
+    async def main():
+        await admission.acquire("a")
+        await admission.acquire("b")
+
+    error = rejection(main())
+    assert (error.status_code, error.reason) == (503, "queue_timeout")
+    assert admission._per_chat == {"a": 1}
+
+def test_high_latency_is_503():
+    admission = AdmissionController(max_concurrency=0, latency_threshold=1, latency_window=30)
+    admission.observe_latency(0.5)
+    asyncio.run(admission.acquire())
+    admission.release()
+
+    admission.observe_latency(3.0)
+    assert admission.recent_latency() == pytest.approx(1.75)
+    error = rejection(admission.acquire())
+    assert (error.status_code, error.reason, error.retry_after) == (503, "latency", TRIGGER_RETRY_AFTER)
+
+def test_latency_outside_the_window_is_forgotten():
+    admission = AdmissionController(max_concurrency=0, latency_threshold=1, latency_window=30)
+    admission._latencies.append((time.monotonic() - 60, 10.0))
+    assert admission.recent_latency() is None
+    asyncio.run(admission.acquire())
+
+class FailingHandle:
+    id = "RouterWorkflow-1"
+
+    async def result(self):
+        raise RuntimeError("worker lost")
+
+def test_failed_watcher_releases_its_slot(monkeypatch):
+    async def main():
+        admission = AdmissionController(max_concurrency=1, max_per_chat=1)
+        monkeypatch.setattr(trigger, "admission", admission)
+        monkeypatch.setattr(trigger, "TRIGGER_CALLBACK_URL", None)
+
+        await admission.acquire("chat")
+        job = trigger._job(FailingHandle())
+        await trigger._watch(FailingHandle(), job, "RouterWorkflow", "chat")
+
+        assert admission._per_chat == {}
+        assert not admission._semaphore.locked()
+
+    asyncio.run(main())
@@ -0,0 +1,34 @@
+import time
+
+from tpr_nriy.common.cache import SQLiteCache
+
+def test_get_returns_value_and_expiry(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"))
+    cache.set("key", "value", ttl=60)
+    value, expires_at = cache.get("key")
+
+    assert value == "value"
+    assert time.time() < expires_at <= time.time() + 60
+    assert cache.get("missing") is None
+
+def test_expired_rows_are_purged_on_open(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCache(path)
+    cache.set("expired", "value", ttl=-1)
+    cache.set("fresh", "value", ttl=60)
+    assert cache.get("expired") is None
+    cache.close()
+
+    cache = SQLiteCache(path)
+    (count,) = cache._conn.execute(f"SELECT COUNT(*) FROM {cache.table}").fetchone()
+    assert count == 1
+
+def test_purge_caps_rows_keeping_the_latest_expiring(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.db"), max_rows=2, purge_interval=0)
+    for i, ttl in enumerate((10, 30, None, 20)):
+        cache.set(f"key-{i}", "value", ttl=ttl)
+
+    assert cache.get("key-0") is None
+    assert cache.get("key-1") is not None
+    assert cache.get("key-2") is not None
+    assert cache.get("key-3") is None
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+
+from tpr_nriy.common.concurrency import SingleFlight, TokenBucket
+
+def test_concurrent_calls_share_one_run():
+    async def main():
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(5)))
+        assert results == ["result"] * 5
+        assert calls == 1
+
+        # Nothing is kept once the call finished
+        assert await flight.do("key", fetch) == "result"
+        assert calls == 2
+
+    asyncio.run(main())
+
+def test_exception_is_shared():
+    async def main():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+
+    asyncio.run(main())
+
+def test_cancelled_first_caller_does_not_fail_followers():
+    async def main():
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "result"
+
+        leader = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await follower == "result"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert calls == 1
+
+    asyncio.run(main())
+
+def test_call_completes_when_every_caller_is_cancelled():
+    async def main():
+        flight = SingleFlight()
+        finished = asyncio.Event()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            finished.set()
+            return "result"
+
+        caller = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0.005)
+        caller.cancel()
+        await asyncio.wait_for(finished.wait(), 1)
+
+    asyncio.run(main())
+
+def test_token_bucket_allows_burst_then_limits_rate():
+    async def main():
+        bucket = TokenBucket(rate=50, capacity=2)
+
+        start = time.monotonic()
+        await bucket.acquire()
+        await bucket.acquire()
+        assert time.monotonic() - start < 0.02
+
+        # Three more tokens at 50/s take about 60 ms
+        for _ in range(3):
+            await bucket.acquire()
+        assert time.monotonic() - start >= 0.05
+
+    asyncio.run(main())
+
+def test_token_bucket_serves_waiters_in_order():
+    async def main():
+        bucket = TokenBucket(rate=100, capacity=1)
+        order = []
+
+        async def take(i):
+            await bucket.acquire()
+            order.append(i)
+
+        await asyncio.gather(*(take(i) for i in range(5)))
+        assert order == list(range(5))
+
+    asyncio.run(main())
@@ -0,0 +1,22 @@
+import pytest
+
+from tpr_nriy.common.config import env_flag
+
+@pytest.mark.parametrize("value", ["1", "true", "TRUE", "yes", "on"])
+def test_truthy_values(monkeypatch, value):
+    monkeypatch.setenv("TEST_FLAG", value)
+    assert env_flag("TEST_FLAG") is True
+
+@pytest.mark.parametrize("value", ["0", "false", "off", "no", "enabled"])
+def test_other_values_are_false(monkeypatch, value):
+    monkeypatch.setenv("TEST_FLAG", value)
+    assert env_flag("TEST_FLAG", default=True) is False
+
+@pytest.mark.parametrize("value", [None, ""])
+def test_unset_gives_default(monkeypatch, value):
+    if value is None:
+        monkeypatch.delenv("TEST_FLAG", raising=False)
+    else:
+        monkeypatch.setenv("TEST_FLAG", value)
+    assert env_flag("TEST_FLAG") is False
+    assert env_flag("TEST_FLAG", default=True) is True
@@ -0,0 +1,81 @@
+from tpr_nriy.common.context_pack import format_item, pack_results, parse_items, tokenize
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+def context(*items) -> str:
+    return "".join(format_item({"title": title, "description": description}) for title, description in items)
+
+def test_parse_items_round_trips_formatted_results():
+    text = context(("서울 날씨", "오늘 맑음"), ("Seoul weather", "sunny\n   and warm"))
+    assert parse_items(text) == [
+        {"title": "서울 날씨", "description": "오늘 맑음"},
+        {"title": "Seoul weather", "description": "sunny and warm"},
+    ]
+
+def test_tokenize_splits_hangul_into_bigrams():
+    assert tokenize("서울날씨 GPT-4") == ["서울", "울날", "날씨", "gpt", "4"]
+
+def test_items_are_ranked_across_search_types():
+    results = {
+        "news": context(("python release", "python 3.13 python release notes")),
+        "web": context(("cooking", "python recipe"), ("python python python", "python language python")),
+    }
+    packed = pack_results(results, "python release", budget=1000, count_tokens=count_words)
+
+    assert packed["kept"] == 3
+    assert packed["contexts"]["news"].startswith("- title: python release")
+    # Best first within a type
+    assert [item["title"] for item in parse_items(packed["contexts"]["web"])] == ["python python python", "cooking"]
+
+def test_irrelevant_items_are_dropped():
+    results = {"web": context(("python", "language"), ("weather", "sunny"))}
+    packed = pack_results(results, "python", budget=1000, count_tokens=count_words)
+
+    assert packed["kept"] == 1
+    assert packed["irrelevant"] == 1
+    assert "weather" not in packed["contexts"]["web"]
+
+def test_same_titles_and_near_duplicates_are_dropped():
+    results = {
+        "news": context(
+            ("Python 3.13 released", "python 3.13 adds a jit compiler"),
+            ("python 3.13 released!", "another outlet, same story about python"),
+        ),
+        "web": context(("Release notes", "python 3.13 adds a jit compiler")),
+    }
+    packed = pack_results(results, "python 3.13", budget=1000, count_tokens=count_words, similarity=0.7)
+
+    assert packed["kept"] == 1
+    assert packed["duplicate"] == 2
+
+def test_items_over_the_budget_are_skipped():
+    results = {"web": context(
+        ("python", "python " * 20),
+        ("python tips", "short python tip"),
+    )}
+    budget = count_words(format_item({"title": "python tips", "description": "short python tip"}))
+    packed = pack_results(results, "python", budget=budget, count_tokens=count_words)
+
+    # The best item does not fit, a smaller one still does
+    assert packed["over_budget"] == 1
+    assert packed["kept"] == 1
+    assert packed["tokens"] == budget
+    assert "python tips" in packed["contexts"]["web"]
+
+def test_budget_smaller_than_any_item_keeps_nothing():
+    results = {"web": context(("python", "language"))}
+    packed = pack_results(results, "python", budget=1, count_tokens=count_words)
+
+    assert packed["contexts"] == {}
+    assert packed["tokens"] == 0
+    assert packed["over_budget"] == 1
+
+def test_empty_results():
+    packed = pack_results({"web": "", "news": ""}, "python", budget=1000, count_tokens=count_words)
+    assert packed == {"contexts": {}, "tokens": 0, "kept": 0, "irrelevant": 0, "duplicate": 0, "over_budget": 0}
+
+def test_empty_query_keeps_everything_that_fits():
+    results = {"web": context(("python", "language"), ("weather", "sunny"))}
+    packed = pack_results(results, "", budget=1000, count_tokens=count_words)
+    assert packed["kept"] == 2
@@ -0,0 +1,47 @@
+from tpr_nriy.common import history_buffer
+from tpr_nriy.common.history_buffer import ChatHistoryBuffer
+
+def _message(message_id: str) -> dict:
+    return {"id": message_id, "chat_id": "chat-1", "user_name": "user", "message": message_id}
+
+def test_append_during_cold_load_is_not_lost():
+    buffer = ChatHistoryBuffer(capacity=10, enabled=True)
+    # A load read PocketBase, then a message was written before it finished
+    snapshot = [_message("2"), _message("1")]
+    buffer.append("chat-1", _message("3"))
+    buffer.load("chat-1", snapshot, complete=True)
+
+    assert [message["id"] for message in buffer.recent("chat-1", 3)] == ["3", "2", "1"]
+
+def test_pending_append_already_in_snapshot_is_not_duplicated():
+    buffer = ChatHistoryBuffer(capacity=10, enabled=True)
+    buffer.append("chat-1", _message("2"))
+    buffer.load("chat-1", [_message("2"), _message("1")], complete=True)
+
+    assert [message["id"] for message in buffer.recent("chat-1", 5)] == ["2", "1"]
+
+def test_expired_pending_append_is_dropped(monkeypatch):
+    buffer = ChatHistoryBuffer(capacity=10, ttl=60, enabled=True)
+    monkeypatch.setattr(history_buffer.time, "monotonic", lambda: 1000.0)
+    buffer.append("chat-1", _message("3"))
+    monkeypatch.setattr(history_buffer.time, "monotonic", lambda: 1061.0)
+    buffer.load("chat-1", [_message("1")], complete=True)
+
+    assert [message["id"] for message in buffer.recent("chat-1", 5)] == ["1"]
+
+def test_warm_append_is_served():
+    buffer = ChatHistoryBuffer(capacity=2, enabled=True)
+    buffer.load("chat-1", [_message("1")], complete=True)
+    buffer.append("chat-1", _message("2"))
+    buffer.append("chat-1", _message("3"))
+
+    assert [message["id"] for message in buffer.recent("chat-1", 2)] == ["3", "2"]
+    # The oldest message fell out of the ring, so more cannot be served
+    assert buffer.recent("chat-1", 3) is None
+
+def test_disabled_buffer_never_serves():
+    buffer = ChatHistoryBuffer(enabled=False)
+    buffer.load("chat-1", [_message("1")], complete=True)
+    buffer.append("chat-1", _message("2"))
+
+    assert buffer.recent("chat-1", 1) is None
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+from tpr_nriy.common.llm import LLMResponseCache
+
+def make_invoke(result, delay=0.0):
+    calls = []
+
+    async def invoke():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+
+    return invoke, calls
+
+def test_miss_then_memory_hit():
+    async def main():
+        cache = LLMResponseCache(maxsize=8, ttl=60, path=None)
+        invoke, calls = make_invoke({"answer": 1})
+
+        assert await cache.get_or_invoke("key", invoke) == {"answer": 1}
+        assert await cache.get_or_invoke("key", invoke) == {"answer": 1}
+        assert len(calls) == 1
+        assert cache.stats() == {"memory_hits": 1, "persistent_hits": 0, "misses": 1, "size": 1}
+
+    asyncio.run(main())
+
+def test_concurrent_misses_share_one_call():
+    async def main():
+        cache = LLMResponseCache(maxsize=8, ttl=60, path=None)
+        invoke, calls = make_invoke({"answer": 1}, delay=0.01)
+
+        results = await asyncio.gather(*(cache.get_or_invoke("key", invoke) for _ in range(5)))
+        assert results == [{"answer": 1}] * 5
+        assert len(calls) == 1
+
+    asyncio.run(main())
+
+def test_persistent_hit_keeps_the_stored_expiry(tmp_path):
+    path = str(tmp_path / "llm.db")
+
+    async def main():
+        invoke, calls = make_invoke({"answer": 1})
+        writer = LLMResponseCache(maxsize=8, ttl=60, path=path)
+        await writer.get_or_invoke("key", invoke)
+        writer.persistent.set("expired", '{"answer": 2}', ttl=-1)
+
+        # A restarted process reads the SQLite tier
+        reader = LLMResponseCache(maxsize=8, ttl=3600, path=path)
+        assert await reader.get_or_invoke("key", invoke) == {"answer": 1}
+        assert len(calls) == 1
+        assert reader.persistent_hits == 1
+        expires_at, _ = reader.memory._data["key"]
+        assert expires_at <= time.monotonic() + 60
+
+        # Expired rows are misses
+        assert await reader.get_or_invoke("expired", invoke) == {"answer": 1}
+        assert len(calls) == 2
+
+    asyncio.run(main())
+
+def test_cancelled_caller_still_fills_the_cache(tmp_path):
+    async def main():
+        cache = LLMResponseCache(maxsize=8, ttl=60, path=str(tmp_path / "llm.db"))
+        invoke, calls = make_invoke({"answer": 1}, delay=0.05)
+
+        caller = asyncio.ensure_future(cache.get_or_invoke("key", invoke))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        assert caller.cancelled()
+
+        # The retry joins the call already in flight
+        assert await cache.get_or_invoke("key", invoke) == {"answer": 1}
+        assert len(calls) == 1
+        assert cache.persistent.get("key") is not None
+
+    asyncio.run(main())
@@ -0,0 +1,44 @@
+import pytest
+
+from tpr_nriy.common.profanity import DEFAULT_LEXICON, ProfanityFilter, normalize
+
+@pytest.fixture(scope="module")
+def profanity_filter() -> ProfanityFilter:
+    return ProfanityFilter(DEFAULT_LEXICON)
+
+@pytest.mark.parametrize("text", [
+    "씨발 진짜",
+    "씨발",
+    "이 병신",
+    "존나 짜증나",
+    "ㅅㅂ",
+    "fuck this",
+    "what the FUCK!",
+])
+def test_clear_profanity_is_decided_locally(profanity_filter, text):
+    assert profanity_filter.classify(text) is True
+
+@pytest.mark.parametrize("text", [
+    "Scunthorpe United",
+    "시바 이누 귀엽다",
+    "아시바 설치",
+    "시발역에서 만나",
+    "졸라맨 보고싶다",
+    "시바견 귀여워",
+    "시발점부터 다시",
+    "shitake mushrooms",
+])
+def test_homographs_and_embedded_terms_are_escalated(profanity_filter, text):
+    assert profanity_filter.classify(text) is None
+
+@pytest.mark.parametrize("text", ["개새끼야", "시 발", "씨*발"])
+def test_variants_are_escalated(profanity_filter, text):
+    assert profanity_filter.classify(text) is None
+
+@pytest.mark.parametrize("text", ["오늘 날씨 좋다", "/뉴스 알려줘", "hello there"])
+def test_clean_messages(profanity_filter, text):
+    assert profanity_filter.classify(text) is False
+
+def test_folding_keeps_length():
+    text = "씨발 개색기 ㅆㅂ"
+    assert len(normalize(text)) == len(normalize(text, fold=False))
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from tpr_nriy.workflows.stages import SKIPPED, StageGraph
+
+def stage(log, name, value=None, delay=0.0):
+    async def run(results):
+        log.append(f"start {name}")
+        await asyncio.sleep(delay)
+        log.append(f"end {name}")
+        return value if value is not None else name
+
+    return run
+
+def test_stages_run_after_their_dependencies():
+    log = []
+
+    async def combine(results):
+        return results["a"] + results["b"]
+
+    graph = (
+        StageGraph()
+        .add("a", stage(log, "a", delay=0.02))
+        .add("b", stage(log, "b", delay=0.01), deps=["a"])
+        .add("c", combine, deps=["a", "b"])
+    )
+    results = asyncio.run(graph.run())
+
+    assert results == {"a": "a", "b": "b", "c": "ab"}
+    assert log == ["start a", "end a", "start b", "end b"]
+
+def test_independent_stages_run_concurrently():
+    log = []
+    graph = (
+        StageGraph()
+        .add("slow", stage(log, "slow", delay=0.02))
+        .add("fast", stage(log, "fast", delay=0.01))
+        .add("after", stage(log, "after"), deps=["slow", "fast"])
+    )
+    asyncio.run(graph.run())
+
+    assert log == ["start slow", "start fast", "end fast", "end slow", "start after", "end after"]
+
+def test_false_condition_skips_the_stage():
+    log = []
+    graph = (
+        StageGraph()
+        .add("check", stage(log, "check", value="profane"))
+        .add("search", stage(log, "search"), deps=["check"], when=lambda results: results["check"] != "profane")
+        .add("answer", stage(log, "answer"), deps=["search"], when=lambda results: results["search"] is not SKIPPED)
+        .add("log", stage(log, "log"), deps=["search"])
+    )
+    results = asyncio.run(graph.run())
+
+    assert results == {"check": "profane", "search": SKIPPED, "answer": SKIPPED, "log": "log"}
+    assert "start search" not in log and "start answer" not in log
+
+def test_true_condition_runs_the_stage():
+    graph = StageGraph().add("a", stage([], "a")).add("b", stage([], "b"), deps=["a"], when=lambda results: True)
+    assert asyncio.run(graph.run()) == {"a": "a", "b": "b"}
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="missing"):
+        StageGraph().add("a", stage([], "a"), deps=["missing"])
+
+def test_stage_failure_propagates():
+    async def fail(results):
+        raise RuntimeError("boom")
+
+    graph = StageGraph().add("a", fail).add("b", stage([], "b"), deps=["a"])
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(graph.run())
@@ -0,0 +1,81 @@
+import asyncio
+import contextvars
+import dataclasses
+import logging
+from datetime import timedelta
+
+import pytest
+from temporalio import activity, worker
+from temporalio.testing import ActivityEnvironment
+
+from tpr_nriy.common.tracing import TracingInterceptor, _with_trace, get_trace_id, set_trace_id
+
+class CallActivity:
+    """Innermost interceptor: calls the activity function like the worker does."""
+
+    async def execute_activity(self, input: worker.ExecuteActivityInput):
+        return await input.fn(*input.args)
+
+def trigger_headers(trace_id: str):
+    """Headers the trigger's client interceptor adds to what it starts."""
+    def build():
+        set_trace_id(trace_id)
+        return _with_trace({})
+    return contextvars.copy_context().run(build)
+
+def run_activity(fn, headers):
+    interceptor = TracingInterceptor().intercept_activity(CallActivity())
+    input = worker.ExecuteActivityInput(fn=fn, args=[], executor=None, headers=headers)
+    return asyncio.run(ActivityEnvironment().run(interceptor.execute_activity, input))
+
+def test_activity_sees_the_trigger_trace_id(caplog):
+    async def lookup():
+        activity.logger.info("looking up")
+        return get_trace_id()
+
+    with caplog.at_level(logging.INFO, logger="temporalio.activity"):
+        assert run_activity(lookup, trigger_headers("abc123")) == "abc123"
+
+    (record,) = caplog.records
+    assert record.trace_id == "abc123"
+    assert "(trace_id: abc123)" in record.getMessage()
+
+def test_failed_attempt_is_logged_with_the_trace_id(caplog):
+    async def fail():
+        raise RuntimeError("naver down")
+
+    with caplog.at_level(logging.WARNING, logger="temporalio.activity"):
+        with pytest.raises(RuntimeError):
+            run_activity(fail, trigger_headers("abc123"))
+
+    (record,) = caplog.records
+    assert "naver down" in record.getMessage()
+    assert record.trace_id == "abc123"
+
+def test_activity_without_a_trace():
+    async def lookup():
+        activity.logger.info("looking up %s", "100%")
+        return get_trace_id()
+
+    assert run_activity(lookup, {}) is None
+
+def heartbeating_run(fn, heartbeat_timeout, is_local=False):
+    env = ActivityEnvironment()
+    env.info = dataclasses.replace(env.info, heartbeat_timeout=heartbeat_timeout, is_local=is_local)
+    heartbeats = []
+    env.on_heartbeat = lambda *details: heartbeats.append(details)
+    interceptor = TracingInterceptor().intercept_activity(CallActivity())
+    input = worker.ExecuteActivityInput(fn=fn, args=[], executor=None, headers={})
+    asyncio.run(env.run(interceptor.execute_activity, input))
+    return heartbeats
+
+async def slow():
+    await asyncio.sleep(0.1)
+
+def test_remote_activity_with_heartbeat_timeout_heartbeats():
+    heartbeats = heartbeating_run(slow, timedelta(seconds=0.06))
+    assert 3 <= len(heartbeats) <= 7
+
+def test_activities_without_heartbeat_timeout_or_local_do_not_heartbeat():
+    assert heartbeating_run(slow, None) == []
+    assert heartbeating_run(slow, timedelta(seconds=0.06), is_local=True) == []
@@ -0,0 +1,71 @@
+import asyncio
+
+from temporalio.exceptions import WorkflowAlreadyStartedError
+
+from tpr_nriy.trigger import http as trigger
+
+class FakeHandle:
+    def __init__(self, workflow_id: str, done: asyncio.Event):
+        self.id = workflow_id
+        self._done = done
+
+    async def result(self):
+        await self._done.wait()
+        return {"reply": "ok"}
+
+class FakeClient:
+    """Starts one execution per workflow ID, like USE_EXISTING + ALLOW_DUPLICATE_FAILED_ONLY."""
+
+    def __init__(self):
+        self.done = asyncio.Event()
+
+    async def start_workflow(self, workflow, arg, *, id, **kwargs):
+        if self.done.is_set():
+            raise WorkflowAlreadyStartedError(id, workflow)
+        return FakeHandle(id, self.done)
+
+    def get_workflow_handle(self, workflow_id):
+        return FakeHandle(workflow_id, self.done)
+
+def test_retried_async_request_sends_one_callback(monkeypatch):
+    async def main():
+        client = FakeClient()
+        callbacks = []
+
+        async def get_client():
+            return client
+
+        async def send_callback(payload, job):
+            callbacks.append(payload)
+
+        monkeypatch.setattr(trigger, "get_temporal_client", get_client)
+        monkeypatch.setattr(trigger, "_send_callback", send_callback)
+        monkeypatch.setattr(trigger, "TRIGGER_CALLBACK_URL", "http://callback.test")
+        monkeypatch.setattr(trigger, "admission", trigger.AdmissionController(max_concurrency=4, max_per_chat=0))
+
+        input = {"logId": "42", "channelId": "chat"}
+        first = await trigger.trigger_workflow("RouterWorkflow", input, async_mode=True)
+        # Retried by the chat bridge while the first execution is running
+        second = await trigger.trigger_workflow("RouterWorkflow", input, async_mode=True)
+        assert first.status_code == second.status_code == 202
+        assert first.body == second.body
+        assert len(trigger._watch_tasks) == 1
+        # The retry does not hold an admission slot
+        assert trigger.admission._semaphore._value == 3
+
+        client.done.set()
+        await asyncio.gather(*trigger._watch_tasks.values())
+        await asyncio.sleep(0)
+        assert not trigger._watch_tasks
+        assert trigger.admission._semaphore._value == 4
+
+        # Retried after the execution completed
+        third = await trigger.trigger_workflow("RouterWorkflow", input, async_mode=True)
+        assert third.body == first.body
+        await asyncio.sleep(0)
+
+        assert len(callbacks) == 1
+        assert callbacks[0]["status"] == "completed"
+        assert callbacks[0]["result"] == {"reply": "ok"}
+
+    asyncio.run(main())
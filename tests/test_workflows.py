@@ -0,0 +1,56 @@
+import typing
+
+from temporalio.client import Client, WorkflowExecutionStatus
+from temporalio.converter import DataConverter
+
+from tests.temporal_env import PROFANE_MARKER, FakeActivities, make_input, run_with_workers
+from tpr_nriy.activities import TASK_QUEUE
+from tpr_nriy.workflows.chat_entity import ChatEntityWorkflow
+from tpr_nriy.workflows.nriy_v1 import NriyV1Workflow
+from tpr_nriy.workflows.router import RouterWorkflow
+
+def test_nriy_v1_result_decodes_as_declared_type():
+    # Parents call nriy_v1 with the typed child workflow API, which decodes
+    # the result with the annotated return type
+    return_type = typing.get_type_hints(NriyV1Workflow.run)["return"]
+    converter = DataConverter.default.payload_converter
+    for value in ("reply", None):
+        payloads = converter.to_payloads([value])
+        assert converter.from_payloads(payloads, [return_type]) == [value]
+
+def test_router_replies_to_command():
+    async def test(client: Client, fakes: FakeActivities) -> None:
+        result = await client.execute_workflow(
+            RouterWorkflow.run, make_input("/hello"), id="router-reply", task_queue=TASK_QUEUE
+        )
+        assert result == {"doReply": True, "message": "reply to /hello"}
+        assert [message["user_name"] for message in fakes.written] == ["user", "Assistant"]
+
+    run_with_workers(test)
+
+def test_router_does_not_reply_to_profanity():
+    async def test(client: Client, fakes: FakeActivities) -> None:
+        result = await client.execute_workflow(
+            RouterWorkflow.run, make_input(f"/hello {PROFANE_MARKER}"), id="router-profane", task_queue=TASK_QUEUE
+        )
+        assert result == {"doReply": False, "message": None}
+        assert "generate_response" not in fakes.calls
+        assert [message["user_name"] for message in fakes.written] == ["user"]
+
+    run_with_workers(test)
+
+def test_chat_entity_survives_profanity():
+    async def test(client: Client, fakes: FakeActivities) -> None:
+        handle = await client.start_workflow(
+            ChatEntityWorkflow.run, "chat-1", id="chat-entity-profane", task_queue=TASK_QUEUE
+        )
+        profane = await handle.execute_update(ChatEntityWorkflow.handle_message, make_input(f"/hello {PROFANE_MARKER}"))
+        assert profane == {"doReply": False, "message": None}
+
+        # The entity keeps running and answers the next message
+        reply = await handle.execute_update(ChatEntityWorkflow.handle_message, make_input("/hello"))
+        assert reply == {"doReply": True, "message": "reply to /hello"}
+        assert (await handle.describe()).status == WorkflowExecutionStatus.RUNNING
+        assert [message["user_name"] for message in fakes.written] == ["user", "user", "Assistant"]
+
+    run_with_workers(test)
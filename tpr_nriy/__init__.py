@@ -1,7 +1,15 @@
-from temporalio.client import Client
 import os
 
 async def get_temporal_client():
     if not hasattr(get_temporal_client, "client"):
-        get_temporal_client.client = await Client.connect(os.environ["TEMPORAL_HOST"], tls=True)
+        # Imported here so that importing the package stays cheap (startup timing)
+        from temporalio.client import Client
+        from tpr_nriy.common.tracing import TracingInterceptor
+
+        get_temporal_client.client = await Client.connect(
+            os.environ["TEMPORAL_HOST"],
+            tls=True,
+            # Also applies to workers created from this client
+            interceptors=[TracingInterceptor()]
+        )
     return get_temporal_client.client
@@ -1,44 +1,102 @@
-import importlib
-import pkgutil
-from typing import Dict, Type, Any, Callable
-from pathlib import Path
-from temporalio import activity
-
-def _discover_activities() -> Dict[str, Callable]:
-    """activities 디렉토리에서 모든 activity 함수를 찾아서 등록합니다."""
-    activity_registry = {}
-    
-    # 현재 디렉토리의 모든 Python 모듈을 찾습니다.
-    package_path = Path(__file__).parent
-    for module_info in pkgutil.iter_modules([str(package_path)]):
-        # __init__.py는 건너뜁니다.
-        if module_info.name == "__init__":
-            continue
-            
-        try:
-            # 모듈을 import합니다.
-            module = importlib.import_module(f".{module_info.name}", package=__package__)
-            
-            # 모듈에서 @activity.defn 데코레이터가 붙은 모든 함수를 찾습니다.
-            for attr_name in dir(module):
-                attr = getattr(module, attr_name)
-                if callable(attr) and hasattr(attr, "__temporal_activity_definition"):
-                    # 함수 이름을 activity 이름으로 사용합니다.
-                    activity_registry[attr_name] = attr
-        except ImportError as e:
-            print(f"Warning: {module_info.name} 모듈을 로드하는데 실패했습니다: {e}")
-    
-    return activity_registry
-
-# activity registry를 동적으로 생성합니다.
-activity_registry = _discover_activities()
+from typing import Dict, Any, Callable, Sequence
+from temporalio import workflow
+
+from tpr_nriy.common.startup import timed_import
+
+# workflow worker 안에서 local activity로 실행할 activity 목록입니다.
+# 짧고 재시도가 안전한 작업만 등록합니다 (task queue 왕복과 history 이벤트를 줄입니다).
+# 실행 중인 workflow의 replay가 달라지므로 배포 사이에만 변경해야 합니다.
+LOCAL_ACTIVITIES = {
+    "check_response_needed",
+    "add_chat_history",
+    "get_chat_history",
+    "get_chat_summary",
+    "pack_context",
+}
+
+# activity 종류별 task queue입니다. 느린 LLM 호출이 빠른 I/O activity를 막지 않도록
+# 종류마다 별도 queue와 worker 동시성 설정을 사용합니다. LOCAL_ACTIVITIES는 종류와 관계없이
+# workflow worker에서 실행됩니다 (WORKFLOW_WORKER_MAX_CONCURRENT_LOCAL_ACTIVITIES로 제한).
+TASK_QUEUE = "nriy"
+ACTIVITY_CLASSES = {
+    "llm": {"analyze_message", "analyze_context", "generate_response", "update_chat_summary"},
+    "search": {"search_naver"},
+    "io": {"add_chat_history", "get_chat_history", "get_chat_summary", "check_response_needed", "pack_context"},
+}
+
+# activity 이름 -> 모듈 이름 (정적 manifest).
+# 모듈을 미리 import하지 않아 trigger 등에서 LLM 라이브러리를 불러오지 않습니다.
+# 새 activity를 추가하면 여기에 등록합니다.
+ACTIVITY_MANIFEST = {
+    "add_chat_history": "add_chat_history",
+    "analyze_context": "analyze_context",
+    "analyze_message": "analyze_message",
+    "check_response_needed": "check_response_needed",
+    "generate_response": "generate_response",
+    "get_chat_history": "get_chat_history",
+    "get_chat_summary": "get_chat_summary",
+    "pack_context": "pack_context",
+    "search_naver": "search_naver",
+    "update_chat_summary": "update_chat_summary",
+}
+
+# 한 번 불러온 activity 함수
+_loaded_activities: Dict[str, Callable] = {}
 
 def get_activity(activity_name: str) -> Callable:
-    """activity 이름으로 activity 함수를 가져옵니다."""
-    if activity_name not in activity_registry:
+    """activity 이름으로 activity 함수를 가져옵니다. 모듈은 처음 요청될 때 import합니다."""
+    if activity_name not in ACTIVITY_MANIFEST:
         raise ValueError(f"Unknown activity: {activity_name}")
-    return activity_registry[activity_name]
+    if activity_name not in _loaded_activities:
+        module = timed_import(f".{ACTIVITY_MANIFEST[activity_name]}", package=__package__)
+        _loaded_activities[activity_name] = getattr(module, activity_name)
+    return _loaded_activities[activity_name]
 
 def get_all_activities() -> Dict[str, Callable]:
     """등록된 모든 activity를 반환합니다."""
-    return activity_registry
+    return {name: get_activity(name) for name in ACTIVITY_MANIFEST}
+
+def get_activity_class(activity_name: str) -> str:
+    """activity가 속한 종류(llm, search, io)를 반환합니다. 등록되지 않은 activity는 io로 취급합니다."""
+    for activity_class, activity_names in ACTIVITY_CLASSES.items():
+        if activity_name in activity_names:
+            return activity_class
+    return "io"
+
+def get_activity_task_queue(activity_class: str) -> str:
+    """activity 종류의 task queue 이름을 반환합니다."""
+    return f"{TASK_QUEUE}-{activity_class}"
+
+def get_activities_by_class(activity_class: str) -> Dict[str, Callable]:
+    """주어진 종류의 activity를 반환합니다."""
+    return {
+        name: get_activity(name)
+        for name in ACTIVITY_MANIFEST
+        if get_activity_class(name) == activity_class
+    }
+
+def is_local_activity(activity_name: str) -> bool:
+    """activity가 local activity로 실행되는지 여부를 반환합니다."""
+    return activity_name in LOCAL_ACTIVITIES
+
+def run_activity(activity_fn: Callable, args: Sequence[Any] = (), **options: Any) -> Any:
+    """
+    Executes an activity from a workflow, as a local activity if it is registered in LOCAL_ACTIVITIES.
+
+    Remote activities are scheduled on the task queue of their activity
+    class unless task_queue is given.
+
+    Args:
+        activity_fn: Activity function
+        args: Activity arguments
+        **options: Options for workflow.execute_activity / execute_local_activity
+            (task_queue is ignored for local activities)
+
+    Returns:
+        Any: Awaitable activity result
+    """
+    if is_local_activity(activity_fn.__name__):
+        options.pop("task_queue", None)
+        return workflow.execute_local_activity(activity_fn, args=args, **options)
+    options.setdefault("task_queue", get_activity_task_queue(get_activity_class(activity_fn.__name__)))
+    return workflow.execute_activity(activity_fn, args=args, **options)
@@ -3,6 +3,7 @@ from datetime import datetime
 import asyncio
 from temporalio import activity
 from tpr_nriy.common.pocketbase import PocketBaseClient
+from tpr_nriy.common.history_buffer import history_buffer
 
 @activity.defn
 async def add_chat_history(
@@ -35,6 +36,9 @@ async def add_chat_history(
     
     # Create PocketBase client and add records concurrently
     client = PocketBaseClient()
-    await client.upsert_record("messages", message_id, message_record),
+    record = await client.upsert_record("messages", message_id, message_record)
+    
+    # Write through to the worker-local history buffer
+    history_buffer.append(chat_id, record)
     
     return message_id 
\ No newline at end of file
@@ -1,8 +1,13 @@
 from typing import Dict, Any, List
 from pydantic import BaseModel, Field
 from temporalio import activity
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
+from tpr_nriy.common.llm import get_chain, get_chat_model, invoke_cached, record_usage
+
+MODEL = "gpt-4.1-nano"
+TEMPERATURE = 0
+# 프롬프트를 바꾸면 올려서 응답 캐시를 무효화합니다.
+PROMPT_VERSION = "1"
 
 class ContextAnalysis(BaseModel):
     news_search: bool = Field(
@@ -18,21 +23,7 @@ class ContextAnalysis(BaseModel):
         description="suggested Korean search keyword or phrase to use if search is needed"
     )
 
-@activity.defn
-async def analyze_context(chat_history: str, message: str) -> Dict[str, Any]:
-    """
-    Analyzes chat history and current message to determine appropriate actions.
-    
-    Args:
-        chat_history: Previous messages in the chat
-        message: Current message to analyze
-    
-    Returns:
-        Dict[str, Any]: Analysis results
-    """
-    # Initialize LLM
-    llm = ChatOpenAI(model="gpt-4.1-nano", temperature=0)
-    
+def _build_chain():
     # Create prompt template
     prompt = ChatPromptTemplate.from_messages([
         ("system", """You are a context analyzer. Analyze the chat history and current message to determine:
@@ -46,12 +37,40 @@ Consider the context from chat history when making decisions."""),
     ])
     
     # Create chain with structured output
-    chain = prompt | llm.with_structured_output(ContextAnalysis)
+    llm = get_chat_model(MODEL, TEMPERATURE)
+    return prompt | llm.with_structured_output(ContextAnalysis, include_raw=True)
+
+@activity.defn
+async def analyze_context(chat_history: str, message: str) -> Dict[str, Any]:
+    """
+    Analyzes chat history and current message to determine appropriate actions.
     
-    # Run analysis
-    result = await chain.ainvoke({
+    Args:
+        chat_history: Previous messages in the chat
+        message: Current message to analyze
+    
+    Returns:
+        Dict[str, Any]: Analysis results, with the token usage of the LLM call
+            under "usage" (empty when no LLM call was made)
+    """
+    # Get the worker-wide chain
+    chain = get_chain(("analyze_context", MODEL, TEMPERATURE), _build_chain)
+    
+    # Run analysis (cached by model, prompt version and inputs)
+    inputs = {
         "chat_history": chat_history,
         "message": message
-    })
+    }
+    
+    # Token usage of this call (stays empty when the result comes from the cache)
+    usage: Dict[str, Any] = {}
+    
+    async def invoke() -> Dict[str, Any]:
+        result = await chain.ainvoke(inputs)
+        if result["parsing_error"] is not None:
+            raise result["parsing_error"]
+        usage.update(record_usage("analyze_context", MODEL, result["raw"], inputs))
+        return result["parsed"].model_dump()
     
-    return result.model_dump() 
\ No newline at end of file
+    result = await invoke_cached("analyze_context", MODEL, TEMPERATURE, PROMPT_VERSION, inputs, invoke)
+    return {**result, "usage": usage} 
\ No newline at end of file
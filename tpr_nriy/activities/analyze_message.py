@@ -1,38 +1,66 @@
 from typing import Dict, Any
 from pydantic import BaseModel, Field
 from temporalio import activity
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
+from tpr_nriy.common.llm import get_chain, get_chat_model, invoke_cached, record_usage
+from tpr_nriy.common.profanity import check_profanity
+
+MODEL = "gpt-4.1-nano"
+TEMPERATURE = 0
+# 프롬프트를 바꾸면 올려서 응답 캐시를 무효화합니다.
+PROMPT_VERSION = "1"
 
 class MessageAnalysis(BaseModel):
     uses_profanity: bool = Field(
         description="Indicates whether the input text contains profanity or offensive language."
     )
 
+def _build_chain():
+    # Create prompt template
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are a message analysis system. Analyze the given message and provide structured information."),
+        ("human", "{message}")
+    ])
+    
+    # Create chain with structured output
+    llm = get_chat_model(MODEL, TEMPERATURE)
+    return prompt | llm.with_structured_output(MessageAnalysis, include_raw=True)
+
 @activity.defn
 async def analyze_message(message: str) -> Dict[str, Any]:
     """
     Analyzes a message using LLM to extract various characteristics.
     
+    Clear-cut cases are decided by the local profanity lexicon without
+    calling the LLM (see PROFANITY_FAST_PATH).
+    
     Args:
         message: The message to analyze
     
     Returns:
-        Dict[str, Any]: Analysis results
+        Dict[str, Any]: Analysis results, with the token usage of the LLM call
+            under "usage" (empty when no LLM call was made)
     """
-    # Initialize LLM
-    llm = ChatOpenAI(model="gpt-4.1-nano", temperature=0)
+    # Local fast path
+    uses_profanity = check_profanity(message)
+    if uses_profanity is not None:
+        return {**MessageAnalysis(uses_profanity=uses_profanity).model_dump(), "usage": {}}
     
-    # Create prompt template
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a message analysis system. Analyze the given message and provide structured information."),
-        ("human", "{message}")
-    ])
+    # Get the worker-wide chain
+    chain = get_chain(("analyze_message", MODEL, TEMPERATURE), _build_chain)
     
-    # Create chain with structured output
-    chain = prompt | llm.with_structured_output(MessageAnalysis)
+    # Run analysis (cached by model, prompt version and input)
+    inputs = {"message": message}
+    
+    # Token usage of this call (stays empty when the result comes from the cache)
+    usage: Dict[str, Any] = {}
     
-    # Run analysis
-    result = await chain.ainvoke({"message": message})
+    async def invoke() -> Dict[str, Any]:
+        result = await chain.ainvoke(inputs)
+        if result["parsing_error"] is not None:
+            raise result["parsing_error"]
+        usage.update(record_usage("analyze_message", MODEL, result["raw"], inputs))
+        return result["parsed"].model_dump()
     
-    return result.model_dump()
+    result = await invoke_cached("analyze_message", MODEL, TEMPERATURE, PROMPT_VERSION, inputs, invoke)
+    return {**result, "usage": usage}
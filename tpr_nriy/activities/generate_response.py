@@ -2,8 +2,11 @@ from typing import Dict, Any
 from textwrap import dedent
 from pydantic import BaseModel
 from temporalio import activity
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
+from tpr_nriy.common.llm import get_chain, get_chat_model, record_usage
+
+MODEL = None
+TEMPERATURE = 0.7
 
 class Context(BaseModel):
     context: str
@@ -15,26 +18,7 @@ class Contexts(BaseModel):
     blog: Context | None = None
     web: Context | None = None
 
-@activity.defn
-async def generate_response(
-    history: str,
-    message: str,
-    contexts: Dict[str, Any]
-) -> str:
-    """
-    Generates a response based on the input and contexts.
-    
-    Args:
-        history: Chat history
-        message: Current message
-        contexts: Various context information (now, history, news, blog, web)
-    
-    Returns:
-        Dict[str, str]: Generated response
-    """
-    # Initialize LLM
-    llm = ChatOpenAI(temperature=0.7)
-    
+def _build_chain():
     # Create prompt template
     prompt = ChatPromptTemplate.from_messages([
         ("system", dedent("""
@@ -71,6 +55,29 @@ async def generate_response(
         """))
     ])
     
+    return prompt | get_chat_model(MODEL, TEMPERATURE)
+
+@activity.defn
+async def generate_response(
+    history: str,
+    message: str,
+    contexts: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Generates a response based on the input and contexts.
+    
+    Args:
+        history: Chat history
+        message: Current message
+        contexts: Various context information (now, history, news, blog, web)
+    
+    Returns:
+        Dict[str, Any]: Generated response under "response" and the token
+            usage of the LLM call, by prompt section, under "usage"
+    """
+    # Get the worker-wide chain
+    chain = get_chain(("generate_response", MODEL, TEMPERATURE), _build_chain)
+    
     # Parse contexts
     contexts = Contexts.model_validate(contexts)
     
@@ -81,7 +88,7 @@ async def generate_response(
     history_context = contexts.history.context if contexts.history else ""
     
     # Generate response
-    response = await prompt | llm.ainvoke({
+    inputs = {
         "now_context": contexts.now.context,
         "history_context": history_context,
         "news_context": news_context,
@@ -89,6 +96,8 @@ async def generate_response(
         "web_context": web_context,
         "history": history,
         "message": message
-    })
-        
-    return response.content
\ No newline at end of file
+    }
+    response = await chain.ainvoke(inputs)
+    usage = record_usage("generate_response", get_chat_model(MODEL, TEMPERATURE).model_name, response, inputs)
+    
+    return {"response": response.content, "usage": usage}
\ No newline at end of file
@@ -1,40 +1,101 @@
+import os
 from typing import List, Dict, Any
 import asyncio
 from temporalio import activity
 from tpr_nriy.common.pocketbase import PocketBaseClient
+from tpr_nriy.common.cache import TTLCache
+from tpr_nriy.common.history_buffer import history_buffer
+
+# worker 로컬 사용자 캐시 설정
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+
+_user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+async def _resolve_users(
+    client: PocketBaseClient,
+    messages: List[Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolves the users referenced by messages with at most one extra request.
+
+    Users are taken from the expanded relation first, then from the worker
+    cache, and any remaining IDs are fetched with a single batched query.
+
+    Args:
+        client: PocketBase client
+        messages: Messages fetched with expand=user_id
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Users keyed by ID
+    """
+    user_map = {}
+    for message in messages:
+        user = message.get("expand", {}).get("user_id")
+        if user:
+            user_map[user["id"]] = user
+            _user_cache.set(user["id"], user)
+
+    missing_ids = []
+    for user_id in {message.get("user_id") for message in messages}:
+        if not user_id or user_id in user_map:
+            continue
+        user = _user_cache.get(user_id)
+        if user is None:
+            missing_ids.append(user_id)
+        else:
+            user_map[user_id] = user
+
+    if missing_ids:
+        users = await client.get_records(
+            "users",
+            {
+                "filter": " || ".join(f"id = '{user_id}'" for user_id in missing_ids),
+                "perPage": len(missing_ids)
+            }
+        )
+        for user in users:
+            user_map[user["id"]] = user
+            _user_cache.set(user["id"], user)
+
+    return user_map
 
 @activity.defn
 async def get_chat_history(chat_id: str, limit: int = 15) -> list[dict[str, Any]]:
     """
     Retrieves recent messages for a given chat.
-    
+
     Args:
         chat_id: Unique identifier for the chat session
         limit: Number of messages to retrieve (default: 15)
-    
+
     Returns:
         List[Dict[str, Any]]: List of messages with user information
     """
     client = PocketBaseClient()
-    
-    # Get messages
-    messages = await client.get_records(
-        "messages",
-        {
-            "filter": f"chat_id = '{chat_id}'",
-            "sort": "-created",
-            "limit": limit,
-            "expand": "user_id"
-        }
-    )
-    
-    # Fetch user information
-    unique_user_ids = list(set(message["user_id"] for message in messages))
-    users = await asyncio.gather(*(client.get_record("users", user_id) for user_id in unique_user_ids))
-    user_map = {user["id"]: user for user in users}
-    
+
+    # Serve from the worker-local buffer when warm, else read PocketBase
+    messages = history_buffer.recent(chat_id, limit)
+    if messages is None:
+        fetch_limit = max(limit, history_buffer.capacity) if history_buffer.enabled else limit
+        messages = await client.get_records(
+            "messages",
+            {
+                "filter": f"chat_id = '{chat_id}'",
+                "sort": "-created",
+                "limit": fetch_limit,
+                "perPage": fetch_limit,
+                "expand": "user_id"
+            }
+        )
+        history_buffer.load(chat_id, messages, complete=len(messages) < fetch_limit)
+        messages = messages[:limit]
+
+    # Resolve user information (expand data, cache, then one batched query)
+    user_map = await _resolve_users(client, messages)
+
     # Add user information to messages
     for message in messages:
-        message["user"] = user_map[message["user_id"]]
-    
+        message["user"] = user_map.get(message.get("user_id"))
+
     return messages
@@ -0,0 +1,53 @@
+from typing import Any, Dict
+import httpx
+from temporalio import activity
+from tpr_nriy.common.pocketbase import PocketBaseClient
+
+# 채팅별 요약을 저장하는 PocketBase collection
+SUMMARY_COLLECTION = "chat_summaries"
+
+async def get_summary_record(client: PocketBaseClient, chat_id: str) -> Dict[str, Any] | None:
+    """
+    Gets the summary record of a chat.
+
+    Args:
+        client: PocketBase client
+        chat_id: Chat ID
+
+    Returns:
+        Dict[str, Any] | None: Record with summary and last_message_id, None if there is none
+    """
+    try:
+        records = await client.get_records(
+            SUMMARY_COLLECTION,
+            {
+                "filter": f"chat_id = '{chat_id}'",
+                "perPage": 1
+            }
+        )
+    except httpx.HTTPStatusError as e:
+        # The collection has not been created yet
+        if e.response.status_code == 404:
+            return None
+        raise
+    return records[0] if records else None
+
+@activity.defn
+async def get_chat_summary(chat_id: str) -> Dict[str, Any]:
+    """
+    Retrieves the rolling conversation summary of a chat.
+
+    Args:
+        chat_id: Unique identifier for the chat session
+
+    Returns:
+        Dict[str, Any]: summary (empty if none yet) and last_message_id, the
+            newest message covered by the summary
+    """
+    record = await get_summary_record(PocketBaseClient(), chat_id)
+    if record is None:
+        return {"summary": "", "last_message_id": None}
+    return {
+        "summary": record.get("summary", ""),
+        "last_message_id": record.get("last_message_id")
+    }
@@ -0,0 +1,37 @@
+import os
+from typing import Any, Dict
+from temporalio import activity
+from tpr_nriy.common.context_pack import pack_results
+from tpr_nriy.common.llm import count_tokens
+from tpr_nriy.common.metrics import registry
+
+# generate_response에 넣을 검색 결과의 최대 토큰 수
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+
+@activity.defn
+async def pack_context(query: str, message: str, results: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Dedupes and ranks search results, keeping the best within CONTEXT_TOKEN_BUDGET.
+
+    Args:
+        query: Search keyword suggested by analyze_context
+        message: Current message
+        results: search_naver results by search type
+
+    Returns:
+        Dict[str, Any]: Packed search contexts keyed by search type
+            ({"context": ...}, in the format generate_response expects)
+    """
+    packed = pack_results(results, f"{query} {message}", CONTEXT_TOKEN_BUDGET, count_tokens)
+
+    items = registry.counter("context_pack_items_total", "Search result items by packing outcome")
+    for outcome in ("kept", "irrelevant", "duplicate", "over_budget"):
+        items.inc(packed[outcome], outcome=outcome)
+    registry.histogram(
+        "context_pack_tokens", "Tokens of packed search results", buckets=(128, 256, 512, 1024, 2048, 4096)
+    ).observe(packed["tokens"])
+
+    return {
+        search_type: {"context": context}
+        for search_type, context in packed["contexts"].items()
+    }
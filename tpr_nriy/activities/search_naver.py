@@ -1,24 +1,90 @@
 import os
 import re
 import html
+import time
+import asyncio
 import httpx
 from typing import List, Dict, Any
 from temporalio import activity
+from tpr_nriy.common.cache import TTLCache, SQLiteCache
+from tpr_nriy.common.concurrency import SingleFlight, TokenBucket
+from tpr_nriy.common.http import create_async_client
+from tpr_nriy.common.metrics import registry
 
-@activity.defn
-async def search_naver(type: str, keyword: str) -> str:
+# 검색 결과 캐시 설정
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+SEARCH_CACHE_TTL = {
+    "news": float(os.getenv("SEARCH_CACHE_TTL_NEWS", "300")),
+    "blog": float(os.getenv("SEARCH_CACHE_TTL_BLOG", "3600")),
+    "web": float(os.getenv("SEARCH_CACHE_TTL_WEB", "3600")),
+}
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH")
+SEARCH_CACHE_PERSISTENT_MAX_ROWS = int(os.getenv("SEARCH_CACHE_PERSISTENT_MAX_ROWS", "100000"))
+
+NAVER_API_URL = os.getenv("NAVER_API_URL", "https://openapi.naver.com").rstrip("/")
+
+# Naver API 호출 제한 (초당 요청 수, 버스트 크기). 호스트 전체 기준의 값입니다.
+NAVER_RATE_LIMIT = float(os.getenv("NAVER_RATE_LIMIT", "10"))
+NAVER_RATE_BURST = float(os.getenv("NAVER_RATE_BURST", "10"))
+# 토큰 버킷은 프로세스마다 따로 있으므로 supervisor가 전달한 WORKER_PROCESSES로 나눕니다.
+# 여러 pod로 실행할 때는 pod 수로 나눈 값을 설정합니다.
+_WORKER_PROCESSES = max(1, int(os.getenv("WORKER_PROCESSES", "1") or "1"))
+
+_search_cache = TTLCache(
+    maxsize=SEARCH_CACHE_SIZE,
+    max_bytes=SEARCH_CACHE_MAX_BYTES,
+    sizeof=lambda value: len(value.encode("utf-8"))
+)
+_search_flight = SingleFlight()
+_rate_limiter = TokenBucket(
+    rate=NAVER_RATE_LIMIT / _WORKER_PROCESSES,
+    capacity=max(1.0, NAVER_RATE_BURST / _WORKER_PROCESSES)
+)
+
+def get_http_client() -> httpx.AsyncClient:
     """
-    Searches content using Naver API.
-    
+    Returns the pooled HTTP client used for the Naver API (configured with NAVER_* variables).
+    """
+    client = getattr(get_http_client, "client", None)
+    if client is None or client.is_closed:
+        client = create_async_client("NAVER")
+        get_http_client.client = client
+    return client
+
+def _get_persistent_cache() -> SQLiteCache | None:
+    """SEARCH_CACHE_PATH가 설정된 경우 SQLite 캐시를 엽니다."""
+    if not SEARCH_CACHE_PATH:
+        return None
+    if not hasattr(_get_persistent_cache, "cache"):
+        _get_persistent_cache.cache = SQLiteCache(
+            SEARCH_CACHE_PATH, table="search_naver", max_rows=SEARCH_CACHE_PERSISTENT_MAX_ROWS
+        )
+    return _get_persistent_cache.cache
+
+def _record_lookup(result: str) -> None:
+    registry.counter("cache_requests_total", "Cache lookups by cache and result").inc(
+        cache="search_naver", result=result
+    )
+
+def _cache_key(type: str, keyword: str) -> str:
+    """Normalizes the keyword so trivially different queries share an entry."""
+    normalized = " ".join(keyword.split()).lower()
+    return f"{type}:{normalized}"
+
+async def _fetch(type: str, keyword: str) -> str:
+    """
+    Calls the Naver search API and formats the results.
+
     Args:
         type: Search type (news, blog, web)
         keyword: Search keyword
-    
+
     Returns:
         str: Formatted search results
     """
     # API endpoint and headers
-    url = f"https://openapi.naver.com/v1/search/{type}.json"
+    url = f"{NAVER_API_URL}/v1/search/{type}.json"
     headers = {
         "X-Naver-Client-Id": os.environ["NAVER_CLIENT_ID"],
         "X-Naver-Client-Secret": os.environ["NAVER_CLIENT_SECRET"]
@@ -27,16 +93,16 @@ async def search_naver(type: str, keyword: str) -> str:
         "query": keyword,
         "display": 20
     }
-    
-    # Make API request
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            result = response.json()
-        else:
-            activity.logger.error(f"Error: {response.status_code}, {response.text}")
-            response.raise_for_status()
-    
+
+    # Wait for quota, then make API request
+    await _rate_limiter.acquire()
+    response = await get_http_client().get(url, headers=headers, params=params)
+    if response.status_code == 200:
+        result = response.json()
+    else:
+        activity.logger.error(f"Error: {response.status_code}, {response.text}")
+        response.raise_for_status()
+
     # Process results
     items = result.get("items", [])
     processed_items = [
@@ -46,15 +112,66 @@ async def search_naver(type: str, keyword: str) -> str:
         }
         for item in items
     ]
-    
+
     # Format results
     context_str = ""
     for item in processed_items:
         context_str += f"- title: {item['title']}\n"
         context_str += f"  description: {item['description']}\n"
-    
+
     # Clean up HTML tags and entities
     context_str = re.sub(r"<[^>]+>", "", context_str)
     context_str = html.unescape(context_str)
 
-    return context_str 
\ No newline at end of file
+    return context_str
+
+async def _load(type: str, keyword: str, key: str, ttl: float) -> str:
+    """Fills the in-memory tier from the persistent tier or the API."""
+    # Persistent tier
+    persistent_cache = _get_persistent_cache()
+    if persistent_cache is not None:
+        stored = await asyncio.to_thread(persistent_cache.get, key)
+        if stored is not None:
+            # Keep the entry's original expiry rather than starting a new TTL
+            _record_lookup("persistent_hit")
+            cached, expires_at = stored
+            if expires_at is not None:
+                ttl = min(ttl, expires_at - time.time())
+            _search_cache.set(key, cached, ttl=ttl)
+            return cached
+
+    _record_lookup("miss")
+    context_str = await _fetch(type, keyword)
+
+    _search_cache.set(key, context_str, ttl=ttl)
+    if persistent_cache is not None:
+        await asyncio.to_thread(persistent_cache.set, key, context_str, ttl)
+
+    return context_str
+
+@activity.defn
+async def search_naver(type: str, keyword: str) -> str:
+    """
+    Searches content using Naver API.
+
+    Results are cached per (type, normalized keyword) in memory and, if
+    SEARCH_CACHE_PATH is set, in a local SQLite file. Concurrent misses for
+    the same key share one API request.
+
+    Args:
+        type: Search type (news, blog, web)
+        keyword: Search keyword
+
+    Returns:
+        str: Formatted search results
+    """
+    key = _cache_key(type, keyword)
+    ttl = SEARCH_CACHE_TTL.get(type, SEARCH_CACHE_TTL["web"])
+
+    # In-memory tier
+    cached = _search_cache.get(key)
+    if cached is not None:
+        _record_lookup("memory_hit")
+        return cached
+
+    return await _search_flight.do(key, lambda: _load(type, keyword, key, ttl))
@@ -0,0 +1,86 @@
+import os
+from typing import Any, Dict, List
+from textwrap import dedent
+from temporalio import activity
+from langchain.prompts import ChatPromptTemplate
+from tpr_nriy.common.llm import get_chain, get_chat_model, record_usage, truncate_tokens
+from tpr_nriy.common.pocketbase import PocketBaseClient
+from tpr_nriy.activities.get_chat_summary import SUMMARY_COLLECTION, get_summary_record
+
+MODEL = "gpt-4.1-nano"
+TEMPERATURE = 0
+# 요약의 최대 토큰 수
+CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv("CHAT_SUMMARY_TOKEN_BUDGET", "300"))
+
+def _build_chain():
+    # Create prompt template
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", dedent("""
+            You maintain a running summary of a group chat.
+            Update the summary with the new messages: keep who said what about which topics,
+            open questions and facts that later replies may need. Drop small talk.
+            Write in Korean, in at most {budget} tokens. Output only the summary.
+        """)),
+        ("user", dedent("""
+            # Current Summary
+            {summary}
+
+            # New Messages
+            {messages}
+        """))
+    ])
+
+    return prompt | get_chat_model(MODEL, TEMPERATURE)
+
+@activity.defn
+async def update_chat_summary(chat_id: str, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Folds messages that left the raw history window into the chat's summary.
+
+    Only messages newer than the summary's last_message_id are summarized,
+    so repeated or overlapping calls do not summarize a message twice.
+
+    Args:
+        chat_id: Unique identifier for the chat session
+        messages: Messages older than the raw history window, newest first
+            (id, user_name, message)
+
+    Returns:
+        Dict[str, Any]: summary and last_message_id after the update
+    """
+    client = PocketBaseClient()
+    record = await get_summary_record(client, chat_id)
+    summary = record.get("summary", "") if record else ""
+    last_message_id = record.get("last_message_id") if record else None
+
+    # Messages after the newest one already in the summary, oldest first
+    new_messages = []
+    for message in messages:
+        if message.get("id") == last_message_id:
+            break
+        new_messages.append(message)
+    new_messages.reverse()
+    if not new_messages:
+        return {"summary": summary, "last_message_id": last_message_id}
+
+    chain = get_chain(("update_chat_summary", MODEL, TEMPERATURE), _build_chain)
+    inputs = {
+        "summary": summary or "(없음)",
+        "messages": "\n".join(
+            f"{message.get('user_name', '')}: {message.get('message', '')}" for message in new_messages
+        )
+    }
+    response = await chain.ainvoke({**inputs, "budget": CHAT_SUMMARY_TOKEN_BUDGET})
+    record_usage("update_chat_summary", MODEL, response, inputs)
+
+    data = {
+        "chat_id": chat_id,
+        "summary": truncate_tokens(response.content.strip(), CHAT_SUMMARY_TOKEN_BUDGET, MODEL),
+        "last_message_id": new_messages[-1].get("id")
+    }
+    if record is None:
+        await client.create_record(SUMMARY_COLLECTION, data)
+    else:
+        await client.update_record(SUMMARY_COLLECTION, record["id"], data)
+
+    return {"summary": data["summary"], "last_message_id": data["last_message_id"]}
@@ -0,0 +1,216 @@
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterator, Tuple
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    In-process LRU cache with per-entry expiry.
+
+    Entries are evicted least-recently-used first once maxsize (or max_bytes,
+    measured with sizeof) is exceeded, and treated as missing once their TTL
+    has passed. Not thread-safe; it is meant to be used from a single asyncio
+    event loop.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float | None = None,
+        max_bytes: int | None = None,
+        sizeof: Callable[[Any], int] | None = None
+    ):
+        """
+        Args:
+            maxsize: Maximum number of entries
+            ttl: Default time-to-live in seconds (None for no expiry)
+            max_bytes: Maximum total size of values (None for no limit)
+            sizeof: Function returning the size of a value (default: len)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or len
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._data: OrderedDict[Hashable, Tuple[float | None, Any]] = OrderedDict()
+        self._sizes: dict[Hashable, int] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Gets a value and marks it as recently used.
+
+        Args:
+            key: Cache key
+            default: Value returned on miss or expiry
+
+        Returns:
+            Any: Cached value or default
+        """
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """
+        Stores a value, evicting the least recently used entries if needed.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Time-to-live in seconds (defaults to the cache TTL)
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            self._remove(key)
+            return
+
+        self._remove(key)
+        self._data[key] = (expires_at, value)
+        self._sizes[key] = size
+        self.nbytes += size
+        while len(self._data) > self.maxsize or (self.max_bytes is not None and self.nbytes > self.max_bytes):
+            self._remove(next(iter(self._data)))
+
+    def _remove(self, key: Hashable) -> Any:
+        entry = self._data.pop(key, _MISSING)
+        if entry is not _MISSING:
+            self.nbytes -= self._sizes.pop(key)
+        return entry
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Removes a key and returns its value (expired or not)."""
+        entry = self._remove(key)
+        return default if entry is _MISSING else entry[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return False
+        expires_at, _ = entry
+        return expires_at is None or expires_at > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._data))
+
+class SQLiteCache:
+    """
+    Persistent key/value tier backed by a local SQLite file.
+
+    Values are strings with an absolute (wall-clock) expiry so they survive
+    restarts. Expired rows are purged when the cache is opened and then at
+    most every purge_interval seconds on writes, which also trims the table
+    to max_rows by dropping the rows closest to expiry. Methods are
+    blocking; call them through asyncio.to_thread() from async code.
+    """
+
+    def __init__(self, path: str, table: str = "cache", max_rows: int | None = None, purge_interval: float = 300):
+        """
+        Args:
+            path: SQLite database file path
+            table: Table name, so several caches can share one file
+            max_rows: Maximum number of rows kept after each purge (None for no limit)
+            purge_interval: Minimum seconds between purges triggered by writes
+        """
+        self.table = table
+        self.max_rows = max_rows
+        self.purge_interval = purge_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_expires_at ON {table} (expires_at)")
+        self.purge()
+
+    def get(self, key: str) -> Tuple[str, float | None] | None:
+        """
+        Returns the stored value and its expiry.
+
+        Returns:
+            Tuple[str, float | None] | None: (value, expires_at as a
+                time.time() timestamp or None for no expiry), or None if
+                missing or expired
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return value, expires_at
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        """Stores a value with an optional time-to-live in seconds."""
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+        if time.monotonic() - self._purged_at >= self.purge_interval:
+            self.purge()
+
+    def purge_expired(self) -> int:
+        """Deletes expired rows and returns how many were removed."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            )
+        return cursor.rowcount
+
+    def purge(self) -> int:
+        """
+        Deletes expired rows, then the rows closest to expiry beyond max_rows.
+
+        Returns:
+            int: Number of rows removed
+        """
+        self._purged_at = time.monotonic()
+        removed = self.purge_expired()
+        if self.max_rows is None:
+            return removed
+        with self._lock, self._conn:
+            (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+            if count > self.max_rows:
+                cursor = self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN ("
+                    f"SELECT key FROM {self.table} ORDER BY expires_at IS NULL, expires_at LIMIT ?)",
+                    (count - self.max_rows,)
+                )
+                removed += cursor.rowcount
+        return removed
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
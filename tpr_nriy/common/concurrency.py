@@ -0,0 +1,77 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """
+    Merges concurrent calls with the same key into one in-flight call.
+
+    The first caller for a key starts the coroutine as a task owned by the
+    SingleFlight; every caller, the first included, awaits the same result
+    (or exception). Cancelling a caller only cancels its own wait: the
+    shared call keeps running for the others, and completes even if every
+    caller has gone (so its side effects, such as filling a cache, still
+    happen). Nothing is kept once the call finishes.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def _finished(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark retrieved so a call nobody waits for any more doesn't log a warning
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Args:
+            key: Identity of the call
+            fn: Coroutine function started by the first caller
+
+        Returns:
+            Any: Result shared by all callers with the same key
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        # shield: a cancelled caller must not cancel the shared call
+        return await asyncio.shield(task)
+
+class TokenBucket:
+    """
+    Asyncio token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`;
+    acquire() waits until a token is available instead of failing.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (default: rate)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Waits until `tokens` tokens are available and takes them."""
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
@@ -0,0 +1,20 @@
+import os
+
+def env_flag(name: str, default: bool = False) -> bool:
+    """
+    Reads a boolean environment variable.
+
+    "1", "true", "yes" and "on" (any case) are true, any other value is
+    false, and an unset or empty variable gives the default.
+
+    Args:
+        name: Environment variable name
+        default: Value when the variable is not set
+
+    Returns:
+        bool: Flag value
+    """
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,145 @@
+import re
+import math
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+_ITEM = re.compile(r"^- title: (.*?)\n  description: (.*?)(?=^- title: |\Z)", re.MULTILINE | re.DOTALL)
+_WORD = re.compile(r"[0-9a-z]+|[가-힣]+")
+
+def parse_items(context: str) -> List[Dict[str, str]]:
+    """
+    Parses results formatted by search_naver back into items.
+
+    Args:
+        context: "- title: ...\\n  description: ...\\n" lines
+
+    Returns:
+        List[Dict[str, str]]: Items with title and description
+    """
+    return [
+        {"title": title.strip(), "description": " ".join(description.split())}
+        for title, description in _ITEM.findall(context)
+    ]
+
+def format_item(item: Dict[str, str]) -> str:
+    return f"- title: {item['title']}\n  description: {item['description']}\n"
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into terms: Latin words and digits as is, Hangul runs as
+    character bigrams (robust to particles and compounds without a morphological analyzer).
+    """
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if len(word) > 1 and "가" <= word[0] <= "힣":
+            terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            terms.append(word)
+    return terms
+
+def bm25_scores(query: List[str], documents: List[List[str]], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """
+    Scores documents against a query with Okapi BM25, using the documents themselves as the corpus.
+
+    Args:
+        query: Query terms
+        documents: Terms of each document
+
+    Returns:
+        List[float]: Score of each document
+    """
+    if not documents:
+        return []
+    average_length = sum(len(document) for document in documents) / len(documents) or 1.0
+    document_frequency = Counter(term for document in documents for term in set(document))
+    idf = {
+        term: math.log(1 + (len(documents) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+        for term in set(query)
+    }
+
+    scores = []
+    for document in documents:
+        frequencies = Counter(document)
+        length_norm = k1 * (1 - b + b * len(document) / average_length)
+        scores.append(sum(
+            idf[term] * frequencies[term] * (k1 + 1) / (frequencies[term] + length_norm)
+            for term in set(query)
+            if term in frequencies
+        ))
+    return scores
+
+def _similar(a: set, b: set, threshold: float) -> bool:
+    return bool(a and b) and len(a & b) / len(a | b) >= threshold
+
+def pack_results(
+    results: Dict[str, str],
+    query: str,
+    budget: int,
+    count_tokens: Callable[[str], int],
+    similarity: float = 0.8
+) -> Dict[str, Any]:
+    """
+    Dedupes, ranks and packs search results into a token budget.
+
+    Items of all search types are scored together with BM25 against the
+    query. Items sharing no term with the query are dropped. Going from the
+    best score down, items with the same title as, or a term overlap
+    (Jaccard) of at least `similarity` with, an already kept item are
+    dropped, and items are kept while they fit in the budget.
+
+    Args:
+        results: search_naver results by search type
+        query: Search keyword and message
+        budget: Maximum tokens of the packed results
+        count_tokens: Token counter
+        similarity: Jaccard similarity above which items are duplicates
+
+    Returns:
+        Dict: contexts (packed results by search type, best first), and
+            the tokens, kept, irrelevant, duplicate and over_budget counts
+    """
+    items = [
+        {**item, "type": search_type}
+        for search_type, context in results.items()
+        for item in parse_items(context)
+    ]
+    terms = [tokenize(f"{item['title']} {item['description']}") for item in items]
+    query_terms = tokenize(query)
+    scores = bm25_scores(query_terms, terms)
+    order = sorted(range(len(items)), key=lambda i: scores[i], reverse=True)
+
+    kept: Dict[str, List[str]] = {}
+    kept_titles = set()
+    kept_terms: List[set] = []
+    tokens = irrelevant = duplicate = over_budget = 0
+    for i in order:
+        item = items[i]
+        if query_terms and scores[i] <= 0:
+            irrelevant += 1
+            continue
+
+        title = " ".join(tokenize(item["title"]))
+        item_terms = set(terms[i])
+        if (title and title in kept_titles) or any(_similar(item_terms, other, similarity) for other in kept_terms):
+            duplicate += 1
+            continue
+
+        text = format_item(item)
+        size = count_tokens(text)
+        if tokens + size > budget:
+            over_budget += 1
+            continue
+
+        tokens += size
+        kept.setdefault(item["type"], []).append(text)
+        kept_titles.add(title)
+        kept_terms.append(item_terms)
+
+    return {
+        "contexts": {search_type: "".join(texts) for search_type, texts in kept.items()},
+        "tokens": tokens,
+        "kept": sum(len(texts) for texts in kept.values()),
+        "irrelevant": irrelevant,
+        "duplicate": duplicate,
+        "over_budget": over_budget,
+    }
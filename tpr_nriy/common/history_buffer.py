@@ -0,0 +1,180 @@
+import os
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Tuple
+
+from tpr_nriy.common.config import env_flag
+
+# 채팅 히스토리 버퍼 설정
+HISTORY_BUFFER_CAPACITY = int(os.getenv("HISTORY_BUFFER_CAPACITY", "50"))
+HISTORY_BUFFER_MAX_CHATS = int(os.getenv("HISTORY_BUFFER_MAX_CHATS", "1000"))
+HISTORY_BUFFER_MAX_BYTES = int(os.getenv("HISTORY_BUFFER_MAX_BYTES", str(32 * 1024 * 1024)))
+HISTORY_BUFFER_TTL = float(os.getenv("HISTORY_BUFFER_TTL", "60"))
+# 다른 프로세스가 쓴 메시지는 TTL이 지나야 보이므로, 기본적으로 worker 프로세스가 하나일 때만 사용합니다.
+# supervisor는 WORKER_PROCESSES를 자식 프로세스에 전달합니다. 여러 pod로 실행할 때는 false로 설정합니다.
+HISTORY_BUFFER_ENABLED = env_flag("HISTORY_BUFFER_ENABLED", int(os.getenv("WORKER_PROCESSES", "1") or "1") <= 1)
+
+class _ChatEntry:
+    __slots__ = ("messages", "sizes", "complete", "loaded_at")
+
+    def __init__(self, capacity: int):
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self.sizes: Deque[int] = deque(maxlen=capacity)
+        self.complete = False
+        self.loaded_at = 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(self.sizes)
+
+class ChatHistoryBuffer:
+    """
+    Bounded, per-chat ring buffer of the most recent messages.
+
+    A chat becomes warm when its history is loaded from PocketBase; after
+    that new messages are written through with append(). Messages appended
+    while a chat is cold are kept for up to ttl seconds and merged into the
+    next load, so a load that read PocketBase before the write cannot lose
+    them. Chats are evicted least-recently-used first when either max_chats
+    or max_bytes is exceeded, and a chat is treated as cold again once ttl
+    seconds have passed since its last load (other workers may have written
+    to it meanwhile). A disabled buffer never serves or stores anything.
+    """
+
+    def __init__(
+        self,
+        capacity: int = HISTORY_BUFFER_CAPACITY,
+        max_chats: int = HISTORY_BUFFER_MAX_CHATS,
+        max_bytes: int = HISTORY_BUFFER_MAX_BYTES,
+        ttl: float = HISTORY_BUFFER_TTL,
+        enabled: bool = HISTORY_BUFFER_ENABLED
+    ):
+        self.capacity = capacity
+        self.max_chats = max_chats
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self._chats: OrderedDict[str, _ChatEntry] = OrderedDict()
+        self._nbytes = 0
+        # 콜드 채팅에 쓴 메시지 (chat_id -> [(기록 시각, record)])
+        self._pending: OrderedDict[str, List[Tuple[float, Dict[str, Any]]]] = OrderedDict()
+
+    @staticmethod
+    def _sizeof(record: Dict[str, Any]) -> int:
+        return len(json.dumps(record, ensure_ascii=False, default=str))
+
+    def _evict(self) -> None:
+        while self._chats and (len(self._chats) > self.max_chats or self._nbytes > self.max_bytes):
+            _, entry = self._chats.popitem(last=False)
+            self._nbytes -= entry.nbytes
+
+    def _take_pending(self, chat_id: str) -> List[Dict[str, Any]]:
+        """Removes and returns the unexpired messages appended while a chat was cold, oldest first."""
+        now = time.monotonic()
+        return [record for appended_at, record in self._pending.pop(chat_id, []) if now - appended_at <= self.ttl]
+
+    def load(self, chat_id: str, messages: List[Dict[str, Any]], complete: bool) -> None:
+        """
+        Replaces the buffered history of a chat with messages read from PocketBase.
+
+        Messages appended since the chat went cold that are missing from
+        messages are added as the newest ones.
+
+        Args:
+            chat_id: Chat ID
+            messages: Messages sorted newest first
+            complete: True if the chat has no older messages than these
+        """
+        if not self.enabled:
+            return
+        self.invalidate(chat_id)
+        entry = _ChatEntry(self.capacity)
+        for message in reversed(messages[:self.capacity]):
+            record = {k: v for k, v in message.items() if k != "user"}
+            entry.messages.append(record)
+            entry.sizes.append(self._sizeof(record))
+        entry.complete = complete and len(messages) <= self.capacity
+        entry.loaded_at = time.monotonic()
+        self._chats[chat_id] = entry
+        self._nbytes += entry.nbytes
+
+        loaded_ids = {message.get("id") for message in messages}
+        for record in self._take_pending(chat_id):
+            if record.get("id") not in loaded_ids:
+                self._write(chat_id, entry, record)
+        self._evict()
+
+    def append(self, chat_id: str, record: Dict[str, Any]) -> None:
+        """
+        Writes a new message through to a warm chat. For a cold chat the
+        message is kept until its next load.
+
+        Args:
+            chat_id: Chat ID
+            record: Message record as stored in PocketBase
+        """
+        if not self.enabled:
+            return
+        entry = self._chats.get(chat_id)
+        if entry is None:
+            pending = self._pending.setdefault(chat_id, [])
+            pending.append((time.monotonic(), dict(record)))
+            del pending[:-self.capacity]
+            self._pending.move_to_end(chat_id)
+            while len(self._pending) > self.max_chats:
+                self._pending.popitem(last=False)
+            return
+        self._write(chat_id, entry, record)
+        self._evict()
+
+    def _write(self, chat_id: str, entry: _ChatEntry, record: Dict[str, Any]) -> None:
+        """Adds a message to a warm chat as its newest one."""
+        # 같은 ID의 메시지(activity 재시도 등)는 교체합니다.
+        for i, message in enumerate(entry.messages):
+            if message.get("id") == record.get("id"):
+                del entry.messages[i]
+                self._nbytes -= entry.sizes[i]
+                del entry.sizes[i]
+                break
+
+        if len(entry.messages) == entry.messages.maxlen:
+            self._nbytes -= entry.sizes[0]
+            entry.complete = False
+        size = self._sizeof(record)
+        entry.messages.append(dict(record))
+        entry.sizes.append(size)
+        self._nbytes += size
+        self._chats.move_to_end(chat_id)
+
+    def recent(self, chat_id: str, limit: int) -> List[Dict[str, Any]] | None:
+        """
+        Returns the latest messages of a chat if they can be served from the buffer.
+
+        Args:
+            chat_id: Chat ID
+            limit: Number of messages requested
+
+        Returns:
+            List[Dict[str, Any]] | None: Messages newest first, or None on miss or staleness
+        """
+        entry = self._chats.get(chat_id) if self.enabled else None
+        if entry is None:
+            return None
+        if time.monotonic() - entry.loaded_at > self.ttl:
+            self.invalidate(chat_id)
+            return None
+        if limit > len(entry.messages) and not entry.complete:
+            return None
+
+        self._chats.move_to_end(chat_id)
+        messages = list(entry.messages)[-limit:] if limit > 0 else []
+        return [dict(message) for message in reversed(messages)]
+
+    def invalidate(self, chat_id: str) -> None:
+        entry = self._chats.pop(chat_id, None)
+        if entry is not None:
+            self._nbytes -= entry.nbytes
+
+# worker 프로세스 전역 버퍼
+history_buffer = ChatHistoryBuffer()
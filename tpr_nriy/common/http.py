@@ -0,0 +1,54 @@
+import os
+import importlib.util
+from typing import Any, List
+import httpx
+
+from tpr_nriy.common.config import env_flag
+
+# 프로세스에서 생성된 공유 client 목록 (worker 종료 시 닫습니다)
+_clients: List[httpx.AsyncClient] = []
+
+def create_async_client(env_prefix: str, default_timeout: float = 10.0, **kwargs: Any) -> httpx.AsyncClient:
+    """
+    Creates a long-lived, pooled AsyncClient configured from environment variables.
+
+    The following variables are read with the given prefix (e.g. POCKETBASE_):
+        {prefix}_MAX_CONNECTIONS: Maximum number of open connections (default: 100)
+        {prefix}_MAX_KEEPALIVE: Maximum number of idle keep-alive connections (default: 20)
+        {prefix}_KEEPALIVE_EXPIRY: Seconds an idle connection is kept (default: 30)
+        {prefix}_TIMEOUT: Read/write/pool timeout in seconds (default: default_timeout)
+        {prefix}_CONNECT_TIMEOUT: Connect timeout in seconds (default: 5)
+        {prefix}_HTTP2: Enable HTTP/2 if the h2 package is installed (default: false)
+
+    Args:
+        env_prefix: Prefix of the environment variables to read
+        default_timeout: Timeout used when {prefix}_TIMEOUT is not set
+        **kwargs: Extra arguments passed to httpx.AsyncClient
+
+    Returns:
+        httpx.AsyncClient: Client registered for close_http_clients()
+    """
+    limits = httpx.Limits(
+        max_connections=int(os.getenv(f"{env_prefix}_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv(f"{env_prefix}_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv(f"{env_prefix}_KEEPALIVE_EXPIRY", "30"))
+    )
+    timeout = httpx.Timeout(
+        float(os.getenv(f"{env_prefix}_TIMEOUT", str(default_timeout))),
+        connect=float(os.getenv(f"{env_prefix}_CONNECT_TIMEOUT", "5"))
+    )
+
+    http2 = env_flag(f"{env_prefix}_HTTP2")
+    if http2 and importlib.util.find_spec("h2") is None:
+        print(f"Warning: {env_prefix}_HTTP2 가 설정되었지만 h2 패키지가 없어 HTTP/1.1을 사용합니다.")
+        http2 = False
+
+    client = httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2, **kwargs)
+    _clients.append(client)
+    return client
+
+async def close_http_clients() -> None:
+    """create_async_client()로 생성된 모든 client를 닫습니다."""
+    while _clients:
+        client = _clients.pop()
+        await client.aclose()
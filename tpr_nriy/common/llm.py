@@ -0,0 +1,315 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+import httpx
+import tiktoken
+from langchain_core.messages import AIMessage
+from langchain_openai import ChatOpenAI
+
+from tpr_nriy.common.http import create_async_client
+from tpr_nriy.common.cache import TTLCache, SQLiteCache
+from tpr_nriy.common.concurrency import SingleFlight
+from tpr_nriy.common.metrics import registry
+
+# temperature 0 응답 캐시 설정
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "4096"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+LLM_CACHE_PERSISTENT_MAX_ROWS = int(os.getenv("LLM_CACHE_PERSISTENT_MAX_ROWS", "100000"))
+
+# worker 프로세스에서 재사용하는 LLM 객체
+_models: Dict[Tuple[str | None, float], ChatOpenAI] = {}
+_chains: Dict[Hashable, Any] = {}
+_encodings: Dict[str, tiktoken.Encoding | None] = {}
+
+# worker 시작 시 미리 불러올 tiktoken encoding (OpenAI chat 모델이 사용하는 encoding)
+TIKTOKEN_PRELOAD = [
+    name.strip()
+    for name in os.getenv("TIKTOKEN_PRELOAD", "o200k_base,cl100k_base").split(",")
+    if name.strip()
+]
+
+# 프롬프트 토큰 수 histogram 구간
+PROMPT_TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the pooled HTTP client shared by all ChatOpenAI instances (configured with OPENAI_* variables).
+
+    When the pool has been closed (worker shutdown), the cached models and
+    chains holding it are dropped as well.
+    """
+    client = getattr(get_http_client, "client", None)
+    if client is None or client.is_closed:
+        _models.clear()
+        _chains.clear()
+        client = create_async_client("OPENAI", default_timeout=60.0)
+        get_http_client.client = client
+    return client
+
+def get_chat_model(model: str | None = None, temperature: float = 0.7) -> ChatOpenAI:
+    """
+    Gets a ChatOpenAI instance shared per (model, temperature).
+
+    Args:
+        model: Model name (None for the langchain default)
+        temperature: Sampling temperature
+
+    Returns:
+        ChatOpenAI: Cached chat model
+    """
+    http_client = get_http_client()
+    key = (model, temperature)
+    if key not in _models:
+        kwargs = {"temperature": temperature, "http_async_client": http_client}
+        if model is not None:
+            kwargs["model"] = model
+        _models[key] = ChatOpenAI(**kwargs)
+    return _models[key]
+
+def get_chain(key: Hashable, build: Callable[[], Any]) -> Any:
+    """
+    Gets a compiled prompt chain, building it on first use.
+
+    Args:
+        key: Identity of the chain (e.g. activity name and model config)
+        build: Function creating the chain
+
+    Returns:
+        Any: Cached runnable chain
+    """
+    get_http_client()
+    if key not in _chains:
+        _chains[key] = build()
+    return _chains[key]
+
+class LLMResponseCache:
+    """
+    Content-addressed cache of deterministic (temperature 0) LLM results.
+
+    Keys hash the activity name, model, prompt version and rendered inputs.
+    Results live in an in-memory LRU tier and, if a path is given, in a
+    SQLite tier shared across restarts. Concurrent misses for a key share one
+    LLM call, which runs as its own task: a cancelled caller does not lose a
+    response that is already being paid for.
+    """
+
+    def __init__(self, maxsize: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL, path: str | None = LLM_CACHE_PATH):
+        self.ttl = ttl
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.persistent = (
+            SQLiteCache(path, table="llm_response", max_rows=LLM_CACHE_PERSISTENT_MAX_ROWS) if path else None
+        )
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self._flight = SingleFlight()
+
+    @staticmethod
+    def make_key(name: str, model: str | None, prompt_version: str, inputs: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {"name": name, "model": model, "prompt_version": prompt_version, "inputs": inputs},
+            ensure_ascii=False,
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get_or_invoke(self, key: str, invoke: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Returns the cached result for key, or runs invoke() and stores its result.
+
+        Args:
+            key: Key from make_key()
+            invoke: Coroutine function calling the LLM; must return JSON-serializable data
+
+        Returns:
+            Dict[str, Any]: LLM result
+        """
+        result = self.memory.get(key)
+        if result is not None:
+            self.memory_hits += 1
+            self._record("memory_hit")
+            return result
+        return await self._flight.do(key, lambda: self._load(key, invoke))
+
+    async def _load(self, key: str, invoke: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Fills the in-memory tier from the persistent tier or the LLM."""
+        if self.persistent is not None:
+            stored = await asyncio.to_thread(self.persistent.get, key)
+            if stored is not None:
+                self.persistent_hits += 1
+                self._record("persistent_hit")
+                value, expires_at = stored
+                result = json.loads(value)
+                # Keep the entry's original expiry rather than starting a new TTL
+                self.memory.set(key, result, ttl=None if expires_at is None else min(self.ttl, expires_at - time.time()))
+                return result
+
+        self.misses += 1
+        self._record("miss")
+        result = await invoke()
+        self.memory.set(key, result)
+        if self.persistent is not None:
+            await asyncio.to_thread(self.persistent.set, key, json.dumps(result, ensure_ascii=False), self.ttl)
+        return result
+
+    @staticmethod
+    def _record(result: str) -> None:
+        registry.counter("cache_requests_total", "Cache lookups by cache and result").inc(
+            cache="llm_response", result=result
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "size": len(self.memory),
+        }
+
+def get_response_cache() -> LLMResponseCache:
+    """worker 프로세스에서 공유하는 LLMResponseCache를 가져옵니다."""
+    if not hasattr(get_response_cache, "cache"):
+        get_response_cache.cache = LLMResponseCache()
+    return get_response_cache.cache
+
+async def invoke_cached(
+    name: str,
+    model: str | None,
+    temperature: float,
+    prompt_version: str,
+    inputs: Dict[str, Any],
+    invoke: Callable[[], Awaitable[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Runs a deterministic LLM call through the response cache.
+
+    Calls with a non-zero temperature are not cached.
+
+    Args:
+        name: Activity name
+        model: Model name
+        temperature: Sampling temperature
+        prompt_version: Version of the prompt template (bump when the prompt changes)
+        inputs: Rendered prompt inputs
+        invoke: Coroutine function calling the LLM
+
+    Returns:
+        Dict[str, Any]: LLM result
+    """
+    if temperature != 0:
+        return await invoke()
+    cache = get_response_cache()
+    key = cache.make_key(name, model, prompt_version, inputs)
+    return await cache.get_or_invoke(key, invoke)
+
+def _load_encoding(name: str) -> tiktoken.Encoding | None:
+    if name not in _encodings:
+        try:
+            _encodings[name] = tiktoken.get_encoding(name)
+        except Exception as e:
+            # The encoding files could not be loaded (e.g. offline); fall back to estimates
+            print(f"Warning: tiktoken encoding {name}을(를) 불러오지 못했습니다: {e}")
+            _encodings[name] = None
+    return _encodings[name]
+
+def preload_encodings(names: List[str] = TIKTOKEN_PRELOAD) -> None:
+    """
+    Loads tiktoken encodings before the first token count needs them.
+
+    The first load of an encoding downloads its BPE file (blocking), so
+    this runs at worker startup, off the event loop.
+
+    Args:
+        names: Encoding names
+    """
+    for name in names:
+        _load_encoding(name)
+
+def _get_encoding(model: str | None) -> tiktoken.Encoding | None:
+    try:
+        name = tiktoken.encoding_name_for_model(model or "")
+    except KeyError:
+        name = "o200k_base"
+    return _load_encoding(name)
+
+def count_tokens(text: str, model: str | None = None) -> int:
+    """
+    Counts the tokens of text for the given model.
+
+    Falls back to an estimate of 4 characters per token when no tiktoken
+    encoding is available.
+
+    Args:
+        text: Text to count
+        model: Model name
+
+    Returns:
+        int: Number of tokens
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+def truncate_tokens(text: str, max_tokens: int, model: str | None = None) -> str:
+    """
+    Cuts text to at most max_tokens tokens for the given model.
+
+    Args:
+        text: Text to cut
+        max_tokens: Token budget
+        model: Model name
+
+    Returns:
+        str: text, or its first max_tokens tokens
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+def record_usage(name: str, model: str, message: AIMessage, sections: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Records the token usage of an LLM call as metrics.
+
+    Prompt tokens are broken down by prompt section (the rendered inputs);
+    whatever the API reports beyond the sections is the "template" section.
+
+    Args:
+        name: Activity name
+        model: Model name
+        message: Raw response from the model
+        sections: Prompt inputs by section name
+
+    Returns:
+        Dict[str, Any]: model, prompt_tokens, completion_tokens and prompt_sections
+    """
+    prompt_sections = {section: count_tokens(text, model) for section, text in sections.items()}
+    usage = message.usage_metadata or {}
+    prompt_tokens = usage.get("input_tokens", sum(prompt_sections.values()))
+    completion_tokens = usage.get("output_tokens", count_tokens(str(message.content), model))
+    prompt_sections["template"] = max(prompt_tokens - sum(prompt_sections.values()), 0)
+
+    tokens = registry.counter("llm_tokens_total", "LLM tokens by activity, model and type")
+    tokens.inc(prompt_tokens, activity=name, model=model, type="prompt")
+    tokens.inc(completion_tokens, activity=name, model=model, type="completion")
+    section_tokens = registry.counter("llm_prompt_section_tokens_total", "LLM prompt tokens by prompt section")
+    for section, count in prompt_sections.items():
+        section_tokens.inc(count, activity=name, model=model, section=section)
+    registry.histogram("llm_prompt_tokens", "LLM prompt size in tokens", buckets=PROMPT_TOKEN_BUCKETS).observe(
+        prompt_tokens, activity=name, model=model
+    )
+
+    return {
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "prompt_sections": prompt_sections,
+    }
@@ -0,0 +1,188 @@
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Sequence, Tuple
+
+# 지표 이름 앞에 붙는 접두사
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "nriy")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _label_key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in self._values.items()]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[_label_key(labels)] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> ([bucket counts], sum, count)
+        self._values: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][i] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self._values.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', repr(bound))])} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Process-wide collection of metrics rendered in the Prometheus text format."""
+
+    def __init__(self, namespace: str = METRICS_NAMESPACE):
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get(self, cls, name: str, help: str, **kwargs) -> _Metric:
+        full_name = f"{self.namespace}_{name}" if self.namespace else name
+        metric = self._metrics.get(full_name)
+        if metric is None:
+            metric = self._metrics[full_name] = cls(full_name, help, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {full_name} already registered as {metric.kind}")
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+registry = MetricsRegistry()
+
+@asynccontextmanager
+async def track(name: str, **labels: str) -> AsyncIterator[None]:
+    """
+    Records latency, call, error and in-flight metrics for a block of work.
+
+    Creates {name}_duration_seconds, {name}_calls_total, {name}_errors_total
+    and {name}_in_flight with the given labels.
+
+    Args:
+        name: Metric name prefix (e.g. "activity", "pocketbase_request")
+        **labels: Metric labels (keep cardinality low)
+    """
+    in_flight = registry.gauge(f"{name}_in_flight", f"In-flight {name} operations")
+    registry.counter(f"{name}_calls_total", f"Total {name} operations").inc(**labels)
+    in_flight.inc(**labels)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        registry.counter(f"{name}_errors_total", f"Failed {name} operations").inc(**labels)
+        raise
+    finally:
+        in_flight.dec(**labels)
+        registry.histogram(f"{name}_duration_seconds", f"Latency of {name} operations").observe(
+            time.perf_counter() - start, **labels
+        )
+
+def render_metrics() -> str:
+    """Renders all metrics in the Prometheus text exposition format."""
+    return registry.render()
+
+async def start_metrics_server(host: str, port: int) -> asyncio.AbstractServer:
+    """
+    Starts a minimal HTTP server answering every request with the metrics.
+
+    Used by worker processes, which do not run FastAPI.
+
+    Args:
+        host: Bind address
+        port: Bind port
+
+    Returns:
+        asyncio.AbstractServer: Running server (close it on shutdown)
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            # Read and ignore the request line and headers
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            body = render_metrics().encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                + f"Content-Length: {len(body)}\r\n".encode("ascii")
+                + b"Connection: close\r\n\r\n"
+                + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -4,12 +4,40 @@ from datetime import datetime
 import httpx
 import asyncio
 
+from tpr_nriy.common.http import create_async_client
+from tpr_nriy.common.metrics import track
+
 # PocketBase 설정
 POCKETBASE_URL = os.getenv("POCKETBASE_URL", "http://localhost:8090")
 
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the worker-scoped, pooled HTTP client used for PocketBase.
+
+    Connection limits, timeouts and HTTP/2 are configured with the
+    POCKETBASE_* variables described in create_async_client().
+    """
+    client = getattr(get_http_client, "client", None)
+    if client is None or client.is_closed:
+        client = create_async_client("POCKETBASE")
+        get_http_client.client = client
+    return client
+
 class PocketBaseClient:
-    def __init__(self, base_url: str = POCKETBASE_URL):
+    def __init__(self, base_url: str = POCKETBASE_URL, http_client: httpx.AsyncClient | None = None):
         self.base_url = base_url.rstrip("/")
+        self._http_client = http_client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._http_client or get_http_client()
+
+    async def _request(self, operation: str, collection: str, method: str, path: str, **kwargs) -> httpx.Response:
+        """Sends a request, recording pocketbase_request metrics, and raises on error status."""
+        async with track("pocketbase_request", operation=operation, collection=collection):
+            response = await self.client.request(method, f"{self.base_url}{path}", **kwargs)
+            response.raise_for_status()
+        return response
     
     async def create_record(
         self,
@@ -26,13 +54,14 @@ class PocketBaseClient:
         Returns:
             Dict[str, Any]: Created record
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/api/collections/{collection}/records",
-                json=data
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._request(
+            "create_record",
+            collection,
+            "POST",
+            f"/api/collections/{collection}/records",
+            json=data
+        )
+        return response.json()
     
     async def upsert_record(
         self,
@@ -51,13 +80,14 @@ class PocketBaseClient:
         Returns:
             Dict[str, Any]: Upserted record
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.put(
-                f"{self.base_url}/api/collections/{collection}/records",
-                json=data
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._request(
+            "upsert_record",
+            collection,
+            "PUT",
+            f"/api/collections/{collection}/records",
+            json=data
+        )
+        return response.json()
     
     async def get_records(
         self,
@@ -74,13 +104,14 @@ class PocketBaseClient:
         Returns:
             List[Dict[str, Any]]: List of records
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/api/collections/{collection}/records",
-                params=params
-            )
-            response.raise_for_status()
-            return response.json()["items"]
+        response = await self._request(
+            "get_records",
+            collection,
+            "GET",
+            f"/api/collections/{collection}/records",
+            params=params
+        )
+        return response.json()["items"]
     
     async def get_record(
         self,
@@ -97,12 +128,13 @@ class PocketBaseClient:
         Returns:
             Dict[str, Any]: Retrieved record
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/api/collections/{collection}/records/{id}"
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._request(
+            "get_record",
+            collection,
+            "GET",
+            f"/api/collections/{collection}/records/{id}"
+        )
+        return response.json()
     
     async def update_record(
         self,
@@ -121,13 +153,14 @@ class PocketBaseClient:
         Returns:
             Dict[str, Any]: Updated record
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.patch(
-                f"{self.base_url}/api/collections/{collection}/records/{id}",
-                json=data
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await self._request(
+            "update_record",
+            collection,
+            "PATCH",
+            f"/api/collections/{collection}/records/{id}",
+            json=data
+        )
+        return response.json()
     
     async def delete_record(
         self,
@@ -144,9 +177,10 @@ class PocketBaseClient:
         Returns:
             bool: True if successful
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(
-                f"{self.base_url}/api/collections/{collection}/records/{id}"
-            )
-            response.raise_for_status()
-            return True
\ No newline at end of file
+        response = await self._request(
+            "delete_record",
+            collection,
+            "DELETE",
+            f"/api/collections/{collection}/records/{id}"
+        )
+        return True
\ No newline at end of file
@@ -0,0 +1,257 @@
+import os
+import re
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+# 욕설 사전 설정
+# PROFANITY_FAST_PATH: off (항상 LLM), profane (욕설 확정만 로컬 판정), full (욕설/정상 모두 로컬 판정)
+PROFANITY_FAST_PATH = os.getenv("PROFANITY_FAST_PATH", "full").lower()
+PROFANITY_LEXICON_PATH = os.getenv("PROFANITY_LEXICON_PATH")
+
+# strong: 단독으로 욕설로 판정, weak: LLM에 판단을 넘김, allow: strong과 겹치면 LLM에 판단을 넘김
+# 일반 단어와 같은 표기(시바견, 시발역, 졸라맨 등)가 있는 욕설은 weak에 둡니다.
+DEFAULT_LEXICON: Dict[str, List[str]] = {
+    "strong": [
+        "씨발", "씨바", "씨팔", "시팔", "병신", "븅신", "좆", "존나",
+        "개새끼", "개새기", "개색기", "개색히", "미친놈", "미친년", "지랄", "염병", "니애미", "느금마",
+        "ㅅㅂ", "ㅆㅂ", "ㅄ", "ㅂㅅ", "ㅈㄹ", "ㅈㄴ", "ㅁㅊ",
+        "fuck", "fucking", "motherfucker", "shit", "bitch", "asshole", "cunt", "bastard",
+    ],
+    "weak": [
+        "시발", "시바", "졸라",
+        "미친", "개같", "새끼", "꺼져", "닥쳐", "등신", "멍청", "또라이",
+        "damn", "crap", "suck", "stupid", "idiot", "dick",
+    ],
+    "allow": [
+        "시발점", "시바견", "병신년", "좆도", "새끼손가락", "새끼줄", "shitake", "dickens",
+    ],
+}
+
+# 글자 사이에 기호를 넣어 우회하는 패턴 (예: 시*발)
+_OBFUSCATION = re.compile(r"[가-힣ㄱ-ㅎa-zA-Z][\*#@%\^\$]+[가-힣ㄱ-ㅎa-zA-Z]")
+
+# 된소리와 비슷한 모음을 하나로 합칩니다 (씨발 -> 시발, 개/게)
+_FOLD = str.maketrans({
+    "ᄁ": "ᄀ", "ᄄ": "ᄃ", "ᄈ": "ᄇ", "ᄊ": "ᄉ", "ᄍ": "ᄌ",
+    "ᆩ": "ᆨ", "ᆻ": "ᆺ",
+    "ᅢ": "ᅦ", "ᅤ": "ᅦ", "ᅨ": "ᅦ",
+})
+
+def normalize(text: str, fold: bool = True) -> str:
+    """
+    Normalizes text for matching.
+
+    Hangul syllables are decomposed into conjoining jamo (NFKD), so a typed
+    abbreviation such as "ㅅㅂ" (two initial consonants) can never match
+    inside regular syllables. Tense consonants and similar vowels are folded,
+    letters are lowercased, and every run of non-letters becomes one space.
+    Folding maps one character to one, so the folded and unfolded forms of
+    a text have the same length.
+
+    Args:
+        text: Raw text
+        fold: Fold tense consonants and similar vowels
+
+    Returns:
+        str: Normalized text
+    """
+    text = unicodedata.normalize("NFKD", text).lower()
+    if fold:
+        text = text.translate(_FOLD)
+    chars = []
+    for char in text:
+        if unicodedata.category(char).startswith("L"):
+            chars.append(char)
+        elif chars and chars[-1] != " ":
+            chars.append(" ")
+    return "".join(chars).strip()
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher (Aho-Corasick automaton) returning every occurrence
+    of every pattern in a single pass over the text.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, str]]):
+        """
+        Args:
+            patterns: (pattern, label) pairs
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, str]]] = [[]]
+
+        for pattern, label in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append((len(pattern), label))
+
+        # 너비 우선으로 failure link를 계산합니다.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Finds all pattern occurrences.
+
+        Args:
+            text: Text to search
+
+        Returns:
+            List[Tuple[int, int, str]]: (start, end, label) of each match
+        """
+        matches = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, label in self._output[state]:
+                matches.append((i + 1 - length, i + 1, label))
+        return matches
+
+def load_lexicon(path: str | None = PROFANITY_LEXICON_PATH) -> Dict[str, List[str]]:
+    """
+    Loads the lexicon, extending the defaults with a file if given.
+
+    The file has one "tier:term" entry per line (tier is strong, weak or
+    allow); blank lines and lines starting with # are ignored.
+
+    Args:
+        path: Lexicon file path
+
+    Returns:
+        Dict[str, List[str]]: Terms keyed by tier
+    """
+    lexicon = {tier: list(terms) for tier, terms in DEFAULT_LEXICON.items()}
+    if path:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                tier, _, term = line.partition(":")
+                if tier not in lexicon or not term.strip():
+                    print(f"Warning: 욕설 사전 항목을 건너뜁니다: {line}")
+                    continue
+                lexicon[tier].append(term.strip())
+    return lexicon
+
+def _script(char: str) -> str | None:
+    """Returns the script of a normalized character (latin or hangul jamo)."""
+    if "a" <= char <= "z":
+        return "latin"
+    if "\u1100" <= char <= "\u11ff":
+        return "hangul"
+    return None
+
+def _inside_word(text: str, start: int, end: int) -> bool:
+    """Whether a match continues into letters of its own script on either side."""
+    script = _script(text[start])
+    return (
+        (start > 0 and _script(text[start - 1]) == script)
+        or (end < len(text) and _script(text[end]) == script)
+    )
+
+class ProfanityFilter:
+    """Lexicon-based profanity classifier for the clear-cut cases."""
+
+    def __init__(self, lexicon: Dict[str, List[str]]):
+        self._matcher = AhoCorasick(
+            (normalize(term).replace(" ", ""), tier)
+            for tier, terms in lexicon.items()
+            for term in terms
+        )
+        # Unfolded spellings of strong terms, to tell them apart from weak
+        # terms that fold to the same text (씨발 and 시발)
+        self._strong = {normalize(term, fold=False).replace(" ", "") for term in lexicon.get("strong", [])}
+
+    def classify(self, text: str) -> bool | None:
+        """
+        Classifies a message.
+
+        A strong term is only decided locally when it stands as a word of
+        its own: Latin terms need word boundaries, and a Hangul term inside
+        a longer Hangul word is escalated (아시바, 시발역, Scunthorpe).
+
+        Args:
+            text: Message to check
+
+        Returns:
+            bool | None: True if clearly profane, False if clearly clean,
+                None if the message should be escalated to the LLM
+        """
+        spaced = normalize(text)
+        exact = normalize(text, fold=False)
+        matches = self._matcher.search(spaced)
+        allowed = [(start, end) for start, end, tier in matches if tier == "allow"]
+        weak = {(start, end) for start, end, tier in matches if tier == "weak"}
+
+        ambiguous = False
+        for start, end, tier in matches:
+            if tier == "weak":
+                ambiguous = True
+            elif tier == "strong":
+                if (start, end) in weak and exact[start:end] not in self._strong:
+                    # Folded spelling of a weak homograph (시발 matching 씨발)
+                    ambiguous = True
+                elif _inside_word(spaced, start, end):
+                    ambiguous = True
+                elif any(a_start <= start and end <= a_end for a_start, a_end in allowed):
+                    ambiguous = True
+                else:
+                    return True
+
+        if ambiguous:
+            return None
+
+        # 띄어쓰기로 쪼갠 욕설(예: "시 발")은 붙여서 다시 확인하되 LLM에 넘깁니다.
+        compact = spaced.replace(" ", "")
+        if any(tier != "allow" for _, _, tier in self._matcher.search(compact)):
+            return None
+        if _OBFUSCATION.search(text):
+            return None
+
+        return False
+
+def get_profanity_filter() -> ProfanityFilter:
+    """worker 프로세스에서 공유하는 ProfanityFilter를 가져옵니다."""
+    if not hasattr(get_profanity_filter, "filter"):
+        get_profanity_filter.filter = ProfanityFilter(load_lexicon())
+    return get_profanity_filter.filter
+
+def check_profanity(text: str) -> bool | None:
+    """
+    Decides profanity locally according to PROFANITY_FAST_PATH.
+
+    Args:
+        text: Message to check
+
+    Returns:
+        bool | None: Local verdict, or None if the LLM should decide
+    """
+    if PROFANITY_FAST_PATH == "off":
+        return None
+    verdict = get_profanity_filter().classify(text)
+    if verdict is False and PROFANITY_FAST_PATH != "full":
+        return None
+    return verdict
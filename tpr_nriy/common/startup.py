@@ -0,0 +1,70 @@
+import time
+import importlib
+from types import ModuleType
+from typing import Dict
+
+# 프로세스 시작 시각. main.py가 다른 import보다 먼저 기록한 값으로 set_process_start()를 호출합니다.
+PROCESS_START = time.perf_counter()
+
+# 모듈별 최초 import 시간 (초)
+import_times: Dict[str, float] = {}
+
+# 모드별로 먼저 따로 import해 시간을 재는 무거운 외부 라이브러리.
+# 이 라이브러리를 처음 사용하는 우리 모듈의 시간에 섞이지 않게 합니다.
+THIRD_PARTY_IMPORTS = {
+    "worker": ["httpx", "temporalio.client", "temporalio.worker", "pydantic", "langchain_core", "langchain_openai", "tiktoken"],
+    "trigger": ["httpx", "temporalio.client", "pydantic", "fastapi", "uvicorn"],
+}
+
+def set_process_start(started_at: float) -> None:
+    """
+    Sets the process start time the report measures from.
+
+    Args:
+        started_at: time.perf_counter() value taken before any other import
+    """
+    global PROCESS_START
+    PROCESS_START = started_at
+
+def timed_import(name: str, package: str | None = None) -> ModuleType:
+    """
+    Imports a module, recording how long the first import took.
+
+    The time includes everything the module imports that was not loaded yet
+    (e.g. langchain for the first LLM activity).
+
+    Args:
+        name: Module name (relative if package is given)
+        package: Package for relative imports
+
+    Returns:
+        ModuleType: Imported module
+    """
+    start = time.perf_counter()
+    module = importlib.import_module(name, package=package)
+    if module.__name__ not in import_times:
+        import_times[module.__name__] = time.perf_counter() - start
+    return module
+
+def import_third_party(mode: str) -> None:
+    """
+    Imports the heavy third-party libraries of a mode, each timed as its own entry.
+
+    Each time only covers what that library loads that was not loaded yet.
+
+    Args:
+        mode: Key of THIRD_PARTY_IMPORTS
+    """
+    for name in THIRD_PARTY_IMPORTS.get(mode, []):
+        timed_import(name)
+
+def report_startup(label: str) -> None:
+    """
+    Prints the per-module import times and the time since process start.
+
+    Args:
+        label: What finished starting (e.g. "worker 'nriy'")
+    """
+    print(f"Startup report for {label}: {time.perf_counter() - PROCESS_START:.3f}s since process start")
+    for name, seconds in sorted(import_times.items(), key=lambda item: item[1], reverse=True):
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
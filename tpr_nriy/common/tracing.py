@@ -0,0 +1,142 @@
+import uuid
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Any, Mapping, Optional, Type
+
+from temporalio import activity, client, converter, worker, workflow
+from temporalio.api.common.v1 import Payload
+
+from tpr_nriy.common.metrics import registry, track
+
+# Temporal header carrying the trace ID from the trigger to workflows and activities
+TRACE_HEADER = "nriy-trace-id"
+
+_trace_id: ContextVar[Optional[str]] = ContextVar("nriy_trace_id", default=None)
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+def get_trace_id() -> Optional[str]:
+    """Returns the trace ID of the current request, workflow or activity."""
+    return _trace_id.get()
+
+def set_trace_id(trace_id: Optional[str]) -> None:
+    _trace_id.set(trace_id)
+
+def _with_trace(headers: Mapping[str, Payload]) -> Mapping[str, Payload]:
+    trace_id = _trace_id.get()
+    if trace_id is None:
+        return headers
+    return {**headers, TRACE_HEADER: converter.default().payload_converter.to_payloads([trace_id])[0]}
+
+def _read_trace(headers: Mapping[str, Payload]) -> None:
+    payload = headers.get(TRACE_HEADER)
+    if payload is not None:
+        _trace_id.set(converter.default().payload_converter.from_payloads([payload])[0])
+
+class _TraceLogFilter(logging.Filter):
+    """Adds the trace ID to activity.logger records, as the trace_id extra and on the message."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        trace_id = _trace_id.get()
+        record.trace_id = trace_id
+        if trace_id is not None:
+            record.msg = f"{record.getMessage()} (trace_id: {trace_id})"
+            record.args = None
+        return True
+
+_trace_log_filter = _TraceLogFilter()
+
+class _ClientOutbound(client.OutboundInterceptor):
+    async def start_workflow(self, input: client.StartWorkflowInput) -> client.WorkflowHandle[Any, Any]:
+        input.headers = _with_trace(input.headers)
+        return await super().start_workflow(input)
+
+    async def start_workflow_update(self, input: client.StartWorkflowUpdateInput) -> client.WorkflowUpdateHandle[Any]:
+        input.headers = _with_trace(input.headers)
+        return await super().start_workflow_update(input)
+
+    async def start_update_with_start_workflow(
+        self, input: client.StartWorkflowUpdateWithStartInput
+    ) -> client.WorkflowUpdateHandle[Any]:
+        input.start_workflow_input.headers = _with_trace(input.start_workflow_input.headers)
+        input.update_workflow_input.headers = _with_trace(input.update_workflow_input.headers)
+        return await super().start_update_with_start_workflow(input)
+
+async def _heartbeat(interval: float) -> None:
+    while True:
+        activity.heartbeat()
+        await asyncio.sleep(interval)
+
+class _ActivityInbound(worker.ActivityInboundInterceptor):
+    async def execute_activity(self, input: worker.ExecuteActivityInput) -> Any:
+        _read_trace(input.headers)
+        info = activity.info()
+        if info.attempt > 1:
+            registry.counter("activity_retries_total", "Activity retry attempts").inc(activity=info.activity_type)
+
+        # Remote activities only learn that the workflow cancelled them from a heartbeat response
+        heartbeat = None
+        if not info.is_local and info.heartbeat_timeout:
+            heartbeat = asyncio.create_task(_heartbeat(info.heartbeat_timeout.total_seconds() / 3))
+        try:
+            async with track("activity", activity=info.activity_type):
+                return await super().execute_activity(input)
+        except Exception as e:
+            activity.logger.warning(f"Activity attempt {info.attempt} failed: {e!r}")
+            raise
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+
+class _WorkflowOutbound(worker.WorkflowOutboundInterceptor):
+    def start_activity(self, input: worker.StartActivityInput) -> workflow.ActivityHandle:
+        input.headers = _with_trace(input.headers)
+        return super().start_activity(input)
+
+    def start_local_activity(self, input: worker.StartLocalActivityInput) -> workflow.ActivityHandle:
+        input.headers = _with_trace(input.headers)
+        return super().start_local_activity(input)
+
+    async def start_child_workflow(self, input: worker.StartChildWorkflowInput) -> workflow.ChildWorkflowHandle:
+        input.headers = _with_trace(input.headers)
+        return await super().start_child_workflow(input)
+
+class _WorkflowInbound(worker.WorkflowInboundInterceptor):
+    def init(self, outbound: worker.WorkflowOutboundInterceptor) -> None:
+        super().init(_WorkflowOutbound(outbound))
+
+    async def execute_workflow(self, input: worker.ExecuteWorkflowInput) -> Any:
+        _read_trace(input.headers)
+        return await super().execute_workflow(input)
+
+    async def handle_update_handler(self, input: worker.HandleUpdateInput) -> Any:
+        # Each update (e.g. a chat message to ChatEntityWorkflow) has its own trace
+        _read_trace(input.headers)
+        return await super().handle_update_handler(input)
+
+class TracingInterceptor(client.Interceptor, worker.Interceptor):
+    """
+    Propagates the trace ID through Temporal headers and records activity metrics.
+
+    Registered on the client, so the trigger adds the trace ID to the
+    workflows and updates it starts, and workers created from the client
+    pass it on to child workflows and activities. Activities are measured
+    with track("activity") and their retry attempts counted; their
+    activity.logger records, including a warning for each failed attempt,
+    carry the trace ID. Remote activities scheduled with a heartbeat_timeout
+    heartbeat while they run, so cancelling them from the workflow stops them.
+    """
+
+    def intercept_client(self, next: client.OutboundInterceptor) -> client.OutboundInterceptor:
+        return _ClientOutbound(next)
+
+    def intercept_activity(self, next: worker.ActivityInboundInterceptor) -> worker.ActivityInboundInterceptor:
+        activity.logger.base_logger.addFilter(_trace_log_filter)
+        return _ActivityInbound(next)
+
+    def workflow_interceptor_class(
+        self, input: worker.WorkflowInterceptorClassInput
+    ) -> Optional[Type[worker.WorkflowInboundInterceptor]]:
+        return _WorkflowInbound
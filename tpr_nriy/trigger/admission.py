@@ -0,0 +1,145 @@
+import os
+import time
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from tpr_nriy.common.metrics import registry
+
+# 트리거 admission control 설정 (0이면 제한 없음)
+# 프로세스당 동시에 실행 중인 workflow 수
+TRIGGER_MAX_CONCURRENCY = int(os.getenv("TRIGGER_MAX_CONCURRENCY", "0"))
+# 채팅당 동시에 실행 중인 workflow 수 (초과하면 429)
+TRIGGER_MAX_PER_CHAT = int(os.getenv("TRIGGER_MAX_PER_CHAT", "0"))
+# 동시 실행 한도에 걸렸을 때 기다릴 수 있는 요청 수와 최대 대기 시간(초)
+TRIGGER_MAX_QUEUE = int(os.getenv("TRIGGER_MAX_QUEUE", "100"))
+TRIGGER_QUEUE_TIMEOUT = float(os.getenv("TRIGGER_QUEUE_TIMEOUT", "5"))
+# 최근 TRIGGER_LATENCY_WINDOW초 동안의 평균 workflow 지연이 이 값(초)을 넘으면 새 요청을 거절합니다 (503)
+TRIGGER_LATENCY_THRESHOLD = float(os.getenv("TRIGGER_LATENCY_THRESHOLD", "0"))
+TRIGGER_LATENCY_WINDOW = float(os.getenv("TRIGGER_LATENCY_WINDOW", "30"))
+# 거절 응답의 Retry-After(초)
+TRIGGER_RETRY_AFTER = int(os.getenv("TRIGGER_RETRY_AFTER", "1"))
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed; carries the HTTP status and Retry-After."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int = TRIGGER_RETRY_AFTER):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Bounds the workflows a trigger process has in flight.
+
+    A request takes a slot with acquire() and gives it back with release()
+    once its workflow result is known. Requests are shed immediately with:
+        429 when their chat already has max_per_chat executions in flight
+        503 when the recent average workflow latency is above latency_threshold
+        503 when all slots are taken and max_queue requests are already waiting
+    Otherwise they wait up to queue_timeout for a slot (503 on timeout).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = TRIGGER_MAX_CONCURRENCY,
+        max_per_chat: int = TRIGGER_MAX_PER_CHAT,
+        max_queue: int = TRIGGER_MAX_QUEUE,
+        queue_timeout: float = TRIGGER_QUEUE_TIMEOUT,
+        latency_threshold: float = TRIGGER_LATENCY_THRESHOLD,
+        latency_window: float = TRIGGER_LATENCY_WINDOW
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_per_chat = max_per_chat
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_threshold = latency_threshold
+        self.latency_window = latency_window
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency > 0 else None
+        self._waiting = 0
+        self._per_chat: Dict[str, int] = {}
+        self._latencies: Deque[Tuple[float, float]] = deque()
+
+    def _shed(self, status_code: int, reason: str) -> AdmissionRejected:
+        registry.counter("trigger_admission_total", "Trigger requests by admission outcome").inc(
+            outcome="shed", reason=reason
+        )
+        return AdmissionRejected(status_code, reason)
+
+    def recent_latency(self) -> Optional[float]:
+        """Average workflow latency over the last latency_window seconds (None without samples)."""
+        cutoff = time.monotonic() - self.latency_window
+        while self._latencies and self._latencies[0][0] < cutoff:
+            self._latencies.popleft()
+        if not self._latencies:
+            return None
+        return sum(latency for _, latency in self._latencies) / len(self._latencies)
+
+    def observe_latency(self, seconds: float) -> None:
+        self._latencies.append((time.monotonic(), seconds))
+
+    async def acquire(self, chat_id: Optional[str] = None) -> None:
+        """
+        Takes a slot for a new execution.
+
+        Args:
+            chat_id: Chat of the message, for the per-chat limit
+
+        Raises:
+            AdmissionRejected: The request should be shed
+        """
+        if chat_id is not None and self.max_per_chat > 0 and self._per_chat.get(chat_id, 0) >= self.max_per_chat:
+            raise self._shed(429, "chat_limit")
+
+        if self.latency_threshold > 0:
+            latency = self.recent_latency()
+            if latency is not None and latency > self.latency_threshold:
+                raise self._shed(503, "latency")
+
+        # Count the chat before waiting so concurrent requests see each other
+        if chat_id is not None:
+            self._per_chat[chat_id] = self._per_chat.get(chat_id, 0) + 1
+        try:
+            await self._acquire_slot()
+        except BaseException:
+            self._release_chat(chat_id)
+            raise
+        registry.counter("trigger_admission_total", "Trigger requests by admission outcome").inc(
+            outcome="admitted", reason="ok"
+        )
+
+    async def _acquire_slot(self) -> None:
+        if self._semaphore is None:
+            return
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return
+        if self._waiting >= self.max_queue:
+            raise self._shed(503, "queue_full")
+
+        queue_depth = registry.gauge("trigger_queue_depth", "Trigger requests waiting for a slot")
+        self._waiting += 1
+        queue_depth.inc()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._shed(503, "queue_timeout")
+        finally:
+            self._waiting -= 1
+            queue_depth.dec()
+
+    def _release_chat(self, chat_id: Optional[str]) -> None:
+        if chat_id is None:
+            return
+        count = self._per_chat.get(chat_id, 0) - 1
+        if count > 0:
+            self._per_chat[chat_id] = count
+        else:
+            self._per_chat.pop(chat_id, None)
+
+    def release(self, chat_id: Optional[str] = None) -> None:
+        """Gives back a slot taken by acquire()."""
+        if self._semaphore is not None:
+            self._semaphore.release()
+        self._release_chat(chat_id)
@@ -1,71 +1,364 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+import os
 import json
+import time
 import uuid
+import asyncio
 from datetime import timedelta
 
-from fastapi import FastAPI, HTTPException
-from temporalio.common import RetryPolicy
-from temporalio.api.enums.v1 import EventType
-import anyio
+import httpx
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from temporalio.client import (
+    WithStartWorkflowOperation,
+    WorkflowFailureError,
+    WorkflowUpdateFailedError,
+    WorkflowUpdateHandle,
+    WorkflowUpdateStage,
+)
+from temporalio.common import RetryPolicy, WorkflowIDConflictPolicy, WorkflowIDReusePolicy
+from temporalio.exceptions import WorkflowAlreadyStartedError
+from temporalio.service import RPCError, RPCStatusCode
 
 from tpr_nriy import get_temporal_client
+from tpr_nriy.common.config import env_flag
+from tpr_nriy.common.http import close_http_clients, create_async_client
+from tpr_nriy.common.metrics import registry, render_metrics, track
+from tpr_nriy.common.tracing import get_trace_id, new_trace_id, set_trace_id
+from tpr_nriy.trigger.admission import AdmissionController, AdmissionRejected
+
+# RouterWorkflow 요청을 채팅별 ChatEntityWorkflow로 보낼지 여부
+CHAT_ENTITY_MODE = env_flag("CHAT_ENTITY_MODE")
+
+# 요청의 trace ID를 받고 돌려주는 HTTP 헤더
+TRACE_ID_HEADER = "X-Trace-Id"
+
+# 비동기 모드 설정
+# async 쿼리 파라미터가 없을 때 비동기 모드(202 응답)를 쓸지 여부
+TRIGGER_ASYNC_DEFAULT = env_flag("TRIGGER_ASYNC_DEFAULT")
+# 결과 조회(long-poll)의 기본/최대 대기 시간(초)
+TRIGGER_POLL_WAIT = float(os.getenv("TRIGGER_POLL_WAIT", "20"))
+TRIGGER_MAX_POLL_WAIT = float(os.getenv("TRIGGER_MAX_POLL_WAIT", "60"))
+# 비동기 실행이 끝나면 결과를 POST할 URL (없으면 사용 안 함)
+TRIGGER_CALLBACK_URL = os.getenv("TRIGGER_CALLBACK_URL")
+TRIGGER_CALLBACK_RETRIES = int(os.getenv("TRIGGER_CALLBACK_RETRIES", "3"))
 
 app = FastAPI(title="TPR NRIY HTTP Trigger")
 
-@app.get("/")
-async def root():
-    return {"message": "Hello World"}
+# 이 프로세스에서 동시에 실행 중인 workflow 수를 제한합니다 (TRIGGER_MAX_* 설정)
+admission = AdmissionController()
 
-@app.post("/workflows/{workflow_name}")
-async def trigger_workflow(workflow_name: str, input: Dict[str, Any]):
+# 비동기 실행의 결과를 기다리는 task, 실행(workflow ID, update ID)마다 하나씩 둡니다
+# (GC되지 않도록 참조를 유지하고, 재시도된 요청이 callback을 중복으로 보내지 않게 합니다)
+_watch_tasks: Dict[Tuple[str, Optional[str]], asyncio.Task] = {}
+
+def get_callback_client() -> httpx.AsyncClient:
+    """Returns the pooled HTTP client for completion callbacks (TRIGGER_CALLBACK_* variables)."""
+    client = getattr(get_callback_client, "client", None)
+    if client is None or client.is_closed:
+        client = create_async_client("TRIGGER_CALLBACK")
+        get_callback_client.client = client
+    return client
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # Workflows and activities started by this request carry the same trace ID
+    set_trace_id(request.headers.get(TRACE_ID_HEADER) or new_trace_id())
+    response = await call_next(request)
+    response.headers[TRACE_ID_HEADER] = get_trace_id()
+    return response
+
+@app.on_event("shutdown")
+async def shutdown():
+    tasks = list(_watch_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await close_http_clients()
+
+def _failure_detail(e: Exception) -> str:
+    cause = getattr(e, "cause", None)
+    return cause.message if cause else str(e)
+
+def _message_id(input: Dict[str, Any]) -> Optional[str]:
+    log_id = input.get("logId")
+    return str(log_id) if log_id not in (None, "") else None
+
+async def _start_in_chat_entity(client, input: Dict[str, Any], wait_for_stage: WorkflowUpdateStage):
     """
-    Trigger a workflow by name.
-    
+    Sends a chat message to the chat's entity workflow with update-with-start.
+
+    The workflow is started if it is not running; otherwise the message is
+    delivered to the running execution. The update ID is derived from the
+    message's logId, so a retried request attaches to the update already
+    accepted for it instead of handling the message twice.
+
     Args:
-        workflow_name: Name of the workflow to trigger
-        input: Input data for the workflow
-    
+        client: Temporal client
+        input: Chat message (RouterWorkflow input)
+        wait_for_stage: Update stage to wait for before returning
+
     Returns:
-        Dict: Workflow execution result
+        WorkflowUpdateHandle: Handle of the handle_message update
     """
+    chat_id = input["channelId"]
+    message_id = _message_id(input)
+    start_operation = WithStartWorkflowOperation(
+        "ChatEntityWorkflow",
+        args=[chat_id],
+        id=f"chat-{chat_id}",
+        id_conflict_policy=WorkflowIDConflictPolicy.USE_EXISTING,
+        task_queue="nriy",
+        task_timeout=timedelta(seconds=5)
+    )
+    return await client.start_update_with_start_workflow(
+        "handle_message",
+        json.dumps(input),
+        id=f"message-{message_id}" if message_id else None,
+        start_workflow_operation=start_operation,
+        wait_for_stage=wait_for_stage
+    )
+
+async def _start(client, workflow_name: str, input: Dict[str, Any], wait_for_stage: WorkflowUpdateStage):
+    """
+    Starts a workflow, or sends the message to its chat entity workflow.
+
+    Workflow IDs are derived from the message's logId ("{workflow}-{logId}"),
+    so a request retried by the chat bridge attaches to the execution
+    started for the first attempt (USE_EXISTING) or, once that finished
+    successfully, returns its result. Failed executions may be started again.
+    Inputs without a logId get a random ID.
+
+    Returns:
+        Tuple[WorkflowHandle | WorkflowUpdateHandle, bool]: Handle whose result()
+            is the workflow result, and whether the message was already handled
+            by an execution that has completed
+    """
+    # Route chat messages to the long-lived per-chat workflow
+    if CHAT_ENTITY_MODE and workflow_name == "RouterWorkflow":
+        return await _start_in_chat_entity(client, input, wait_for_stage), False
+
+    message_id = _message_id(input)
+    workflow_id = f"{workflow_name}-{message_id}" if message_id else str(uuid.uuid4())
     try:
-        # Create Temporal client
-        client = await get_temporal_client()
-        
-        # Start workflow
         handle = await client.start_workflow(
             workflow_name,
             json.dumps(input),
-            id=str(uuid.uuid4()),
+            id=workflow_id,
             task_queue="nriy",
             execution_timeout=timedelta(seconds=300),
             retry_policy=RetryPolicy(
                 maximum_attempts=1
             ),
-            task_timeout=timedelta(seconds=5)
+            task_timeout=timedelta(seconds=5),
+            id_conflict_policy=WorkflowIDConflictPolicy.USE_EXISTING,
+            id_reuse_policy=WorkflowIDReusePolicy.ALLOW_DUPLICATE_FAILED_ONLY
         )
-        
-        while True:
-            history = await handle.fetch_history()
-            
-            completed_events = [e for e in history.events if e.event_type == EventType.EVENT_TYPE_WORKFLOW_TASK_COMPLETED]
-            failed_events = [e for e in history.events if e.event_type in [EventType.EVENT_TYPE_WORKFLOW_TASK_FAILED, EventType.EVENT_TYPE_WORKFLOW_TASK_TIMED_OUT]]
-            
-            if completed_events:
-                break
-            elif failed_events:
-                await handle.terminate(reason="Workflow Task Failed")
-                raise HTTPException(status_code=500, detail=failed_events[0].workflow_task_failed_event_attributes.failure.cause.message)
-            
-            await anyio.sleep(0.5)
-        
-        # Get result
-        result = await handle.result()
-        return result
-        
+        return handle, False
+    except WorkflowAlreadyStartedError:
+        # Already completed for this message: serve the stored result
+        _count_deduplicated(workflow_name)
+        return client.get_workflow_handle(workflow_id), True
+
+def _count_deduplicated(workflow_name: str) -> None:
+    registry.counter("trigger_deduplicated_total", "Requests answered by an earlier execution").inc(
+        workflow=workflow_name
+    )
+
+async def _result(handle) -> Any:
+    """
+    Waits for a workflow or update result, mapping failures to HTTP 500.
+
+    The worker fails the whole execution on any workflow exception, so a
+    broken workflow surfaces here instead of retrying its workflow task
+    until the execution timeout.
+    """
+    try:
+        return await handle.result()
+    except (WorkflowFailureError, WorkflowUpdateFailedError) as e:
+        raise HTTPException(status_code=500, detail=_failure_detail(e))
+
+def _job(handle) -> Dict[str, Any]:
+    """Identifies an async execution: workflow ID, plus the update ID in chat entity mode."""
+    if isinstance(handle, WorkflowUpdateHandle):
+        workflow_id, update_id = handle.workflow_id, handle.id
+        result_url = f"/workflows/{workflow_id}/result?update_id={update_id}"
+    else:
+        workflow_id, update_id = handle.id, None
+        result_url = f"/workflows/{workflow_id}/result"
+    return {"workflow_id": workflow_id, "update_id": update_id, "result_url": result_url}
+
+async def _wait(handle, workflow_name: str) -> Any:
+    """Waits for the result, recording trigger_wait metrics and the latency seen by admission control."""
+    start = time.monotonic()
+    try:
+        async with track("trigger_wait", workflow=workflow_name):
+            return await _result(handle)
+    finally:
+        admission.observe_latency(time.monotonic() - start)
+
+async def _watch(handle, job: Dict[str, Any], workflow_name: str, chat_id: Optional[str]) -> None:
+    """Holds an async execution's admission slot until it finishes, then sends the callback."""
+    try:
+        payload = {**job, "status": "completed", "result": await _wait(handle, workflow_name)}
+    except HTTPException as e:
+        payload = {**job, "status": "failed", "error": e.detail}
+    except Exception as e:
+        payload = {**job, "status": "failed", "error": str(e)}
+    finally:
+        admission.release(chat_id)
+
+    if TRIGGER_CALLBACK_URL:
+        await _send_callback(payload, job)
+
+async def _send_callback(payload: Dict[str, Any], job: Dict[str, Any]) -> None:
+    """POSTs the outcome of an async execution to TRIGGER_CALLBACK_URL."""
+    callbacks = registry.counter("trigger_callbacks_total", "Completion callbacks by outcome")
+    for attempt in range(TRIGGER_CALLBACK_RETRIES + 1):
+        try:
+            async with track("trigger_callback"):
+                response = await get_callback_client().post(
+                    TRIGGER_CALLBACK_URL,
+                    json=payload,
+                    headers={TRACE_ID_HEADER: get_trace_id() or ""}
+                )
+                response.raise_for_status()
+            callbacks.inc(status="delivered")
+            return
+        except httpx.HTTPError as e:
+            if attempt == TRIGGER_CALLBACK_RETRIES:
+                print(f"Callback for {job['workflow_id']} failed: {e}")
+                callbacks.inc(status="failed")
+                return
+            await asyncio.sleep(2 ** attempt)
+
+@app.get("/")
+async def root():
+    return {"message": "Hello World"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Trigger metrics in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.post("/workflows/{workflow_name}")
+async def trigger_workflow(
+    workflow_name: str,
+    input: Dict[str, Any],
+    async_mode: Optional[bool] = Query(None, alias="async")
+):
+    """
+    Trigger a workflow by name.
+
+    In async mode (?async=true, default: TRIGGER_ASYNC_DEFAULT) the request
+    returns 202 as soon as the workflow has started. The result is
+    available from the returned result_url and, if TRIGGER_CALLBACK_URL is
+    set, POSTed there when the execution finishes. A retried request for a
+    message whose execution is already watched, or has already completed,
+    gets the same job back without a second callback.
+
+    Requests over the admission limits (see AdmissionController) are
+    rejected with 429/503 and a Retry-After header.
+
+    Args:
+        workflow_name: Name of the workflow to trigger
+        input: Input data for the workflow
+        async_mode: Return 202 with the workflow ID instead of waiting
+
+    Returns:
+        Dict: Workflow execution result, or the job IDs and result_url in async mode
+    """
+    if async_mode is None:
+        async_mode = TRIGGER_ASYNC_DEFAULT
+
+    # Shed load before starting anything (429/503 with Retry-After)
+    chat_id = input.get("channelId") if isinstance(input.get("channelId"), str) else None
+    try:
+        await admission.acquire(chat_id)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=f"Request shed: {e.reason}",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    watching = False
+    try:
+        # Create Temporal client
+        client = await get_temporal_client()
+
+        if not async_mode:
+            handle, _ = await _start(client, workflow_name, input, WorkflowUpdateStage.ACCEPTED)
+            return await _wait(handle, workflow_name)
+
+        async with track("trigger_start", workflow=workflow_name):
+            handle, completed = await _start(client, workflow_name, input, WorkflowUpdateStage.ACCEPTED)
+        job = _job(handle)
+        key = (job["workflow_id"], job["update_id"])
+        if completed:
+            # The first attempt's watcher already sent the callback
+            return JSONResponse(status_code=202, content=job)
+        if key in _watch_tasks:
+            # Retried while the first attempt's execution is still running
+            _count_deduplicated(workflow_name)
+            return JSONResponse(status_code=202, content=job)
+
+        # The slot is released when the execution finishes
+        task = asyncio.create_task(_watch(handle, job, workflow_name, chat_id))
+        _watch_tasks[key] = task
+        task.add_done_callback(lambda _: _watch_tasks.pop(key, None))
+        watching = True
+        return JSONResponse(status_code=202, content=job)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if not watching:
+            admission.release(chat_id)
+
+@app.get("/workflows/{workflow_id}/result")
+async def get_workflow_result(
+    workflow_id: str,
+    update_id: Optional[str] = None,
+    wait: float = Query(TRIGGER_POLL_WAIT, gt=0, le=TRIGGER_MAX_POLL_WAIT)
+):
+    """
+    Gets the result of an async execution, long-polling until it finishes.
+
+    Args:
+        workflow_id: Workflow ID returned by the async trigger
+        update_id: Update ID returned by the async trigger (chat entity mode)
+        wait: Seconds to wait for the execution to finish
+
+    Returns:
+        Dict: Workflow execution result, or 202 with status "running" if it
+            did not finish within wait seconds
+    """
+    try:
+        client = await get_temporal_client()
+        handle = client.get_workflow_handle(workflow_id)
+        if update_id:
+            handle = handle.get_update_handle(update_id)
+
+        try:
+            return await asyncio.wait_for(_result(handle), wait)
+        except asyncio.TimeoutError:
+            return JSONResponse(
+                status_code=202,
+                content={"workflow_id": workflow_id, "update_id": update_id, "status": "running"}
+            )
+
+    except HTTPException:
+        raise
+    except RPCError as e:
+        if e.status == RPCStatusCode.NOT_FOUND:
+            raise HTTPException(status_code=404, detail=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,18 +1,127 @@
+import os
+import asyncio
+from typing import Any, Dict, List
 from temporalio.client import Client
 from temporalio.worker import Worker
 from temporalio.worker.workflow_sandbox import SandboxedWorkflowRunner, SandboxRestrictions
 
 from tpr_nriy.workflows import get_all_workflows
-from tpr_nriy.activities import get_all_activities
+from tpr_nriy.activities import (
+    ACTIVITY_CLASSES,
+    TASK_QUEUE,
+    get_activities_by_class,
+    get_activity_task_queue,
+    get_all_activities,
+    is_local_activity,
+)
+from tpr_nriy.common.http import close_http_clients
+from tpr_nriy.common.llm import preload_encodings
+from tpr_nriy.common.metrics import start_metrics_server
+
+# 이 프로세스가 처리할 queue 종류 (workflow 및 ACTIVITY_CLASSES의 키).
+# 기본값은 workflow와 remote activity가 있는 종류입니다. 모두 local activity인 종류(현재 io)는
+# workflow worker가 실행하므로 queue에 task가 들어오지 않습니다.
+DEFAULT_TASK_QUEUES = ["workflow"] + [
+    activity_class
+    for activity_class, activity_names in ACTIVITY_CLASSES.items()
+    if not all(is_local_activity(name) for name in activity_names)
+]
+WORKER_TASK_QUEUES = [
+    name.strip()
+    for name in os.getenv("WORKER_TASK_QUEUES", ",".join(DEFAULT_TASK_QUEUES)).split(",")
+    if name.strip()
+]
+
+# 지표(/metrics)를 제공할 포트 (0이면 사용 안 함). supervisor 모드에서는 프로세스 번호만큼 더합니다.
+METRICS_HOST = os.getenv("METRICS_HOST", "0.0.0.0")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Worker 인자와 환경 변수 접미사의 대응 ({종류}_WORKER_{접미사}, 예: LLM_WORKER_MAX_CONCURRENT_ACTIVITIES)
+_WORKER_OPTIONS = {
+    "max_concurrent_activities": "MAX_CONCURRENT_ACTIVITIES",
+    "max_concurrent_local_activities": "MAX_CONCURRENT_LOCAL_ACTIVITIES",
+    "max_concurrent_workflow_tasks": "MAX_CONCURRENT_WORKFLOW_TASKS",
+    "max_concurrent_activity_task_polls": "MAX_CONCURRENT_ACTIVITY_TASK_POLLS",
+    "max_concurrent_workflow_task_polls": "MAX_CONCURRENT_WORKFLOW_TASK_POLLS",
+}
+
+def _worker_options(queue_name: str) -> Dict[str, Any]:
+    """환경 변수에 설정된 worker 동시성 옵션만 반환합니다 (나머지는 SDK 기본값)."""
+    options = {}
+    for option, suffix in _WORKER_OPTIONS.items():
+        value = os.getenv(f"{queue_name.upper()}_WORKER_{suffix}")
+        if value:
+            options[option] = int(value)
+    return options
+
+class NriyWorkerGroup:
+    """
+    Runs the workers for the configured task queues in one process and
+    closes the shared HTTP connection pools on shutdown. Serves the
+    process's metrics over HTTP when METRICS_PORT is set.
+    """
+
+    def __init__(self, workers: List[Worker]):
+        self.workers = workers
+
+    async def run(self) -> None:
+        metrics_server = None
+        if METRICS_PORT:
+            port = METRICS_PORT + int(os.getenv("WORKER_PROCESS_INDEX", "0"))
+            metrics_server = await start_metrics_server(METRICS_HOST, port)
+        tasks = [asyncio.create_task(worker.run()) for worker in self.workers]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            if metrics_server is not None:
+                metrics_server.close()
+            # Stop the remaining workers if one of them failed
+            await asyncio.gather(
+                *(worker.shutdown() for worker, task in zip(self.workers, tasks) if not task.done()),
+                return_exceptions=True
+            )
+            await close_http_clients()
+
+    async def shutdown(self) -> None:
+        """Gracefully stops all workers, letting in-flight tasks finish."""
+        await asyncio.gather(*(worker.shutdown() for worker in self.workers))
 
 async def create_worker(client: Client):
-    worker = Worker(
-        client,
-        task_queue="nriy",
-        workflows=list(get_all_workflows().values()),
-        activities=list(get_all_activities().values()),
-        workflow_runner=SandboxedWorkflowRunner(
-            restrictions=SandboxRestrictions.default.with_passthrough_all_modules()
-        )
-    )
-    return worker
+    """
+    Creates the workers selected by WORKER_TASK_QUEUES.
+
+    The workflow worker serves the "nriy" queue with all workflows and the
+    local activities; each activity class (llm, search, io) is served on
+    its own queue so it can be scaled and limited independently.
+    """
+    # Token counting (LLM usage, context packing) needs the tiktoken encodings
+    if "workflow" in WORKER_TASK_QUEUES or "llm" in WORKER_TASK_QUEUES:
+        await asyncio.to_thread(preload_encodings)
+
+    workers = []
+    for queue_name in WORKER_TASK_QUEUES:
+        if queue_name == "workflow":
+            workers.append(Worker(
+                client,
+                task_queue=TASK_QUEUE,
+                workflows=list(get_all_workflows().values()),
+                activities=[fn for name, fn in get_all_activities().items() if is_local_activity(name)],
+                # Fail the execution (not just the workflow task) on any exception so
+                # the trigger's handle.result() returns immediately.
+                workflow_failure_exception_types=[Exception],
+                workflow_runner=SandboxedWorkflowRunner(
+                    restrictions=SandboxRestrictions.default.with_passthrough_all_modules()
+                ),
+                **_worker_options(queue_name)
+            ))
+        elif queue_name in ACTIVITY_CLASSES:
+            workers.append(Worker(
+                client,
+                task_queue=get_activity_task_queue(queue_name),
+                activities=list(get_activities_by_class(queue_name).values()),
+                **_worker_options(queue_name)
+            ))
+        else:
+            raise ValueError(f"Unknown task queue: {queue_name}")
+
+    return NriyWorkerGroup(workers)
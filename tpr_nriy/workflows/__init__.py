@@ -1,45 +1,33 @@
-import importlib
-import pkgutil
 from typing import Dict, Type, Any
-from pathlib import Path
-from temporalio import workflow
 
-def _discover_workflows() -> Dict[str, Type]:
-    """workflows 디렉토리에서 모든 workflow 클래스를 찾아서 등록합니다."""
-    workflow_registry = {}
-    
-    # 현재 디렉토리의 모든 Python 모듈을 찾습니다.
-    package_path = Path(__file__).parent
-    for module_info in pkgutil.iter_modules([str(package_path)]):
-        # __init__.py는 건너뜁니다.
-        if module_info.name == "__init__":
-            continue
-            
-        try:
-            # 모듈을 import합니다.
-            module = importlib.import_module(f".{module_info.name}", package=__package__)
-            
-            # 모듈에서 @workflow.defn 데코레이터가 붙은 모든 클래스를 찾습니다.
-            for attr_name in dir(module):
-                attr = getattr(module, attr_name)
-                if isinstance(attr, type) and hasattr(attr, "__temporal_workflow_definition"):
-                    # 클래스 이름을 workflow 이름으로 사용합니다.
-                    workflow_name = attr_name.lower()
-                    workflow_registry[workflow_name] = attr
-        except ImportError as e:
-            print(f"Warning: {module_info.name} 모듈을 로드하는데 실패했습니다: {e}")
-    
-    return workflow_registry
+from tpr_nriy.common.startup import timed_import
 
-# workflow registry를 동적으로 생성합니다.
-workflow_registry = _discover_workflows()
+# workflow 모듈이 import할 때 읽는 환경 변수(NRIY_SPECULATIVE_ANALYSIS, CHAT_SUMMARY_*, CHAT_ENTITY_*,
+# CHAT_DEBOUNCE_* 등)는 배포 단위 설정입니다. 실행 중인 workflow의 replay가 달라질 수 있으므로,
+# 값을 바꿀 때는 실행 중인 workflow가 끝난 뒤 worker를 교체해야 합니다.
+
+# workflow 이름 -> (모듈 이름, 클래스 이름) (정적 manifest).
+# 모듈은 처음 요청될 때 import합니다. 새 workflow를 추가하면 여기에 등록합니다.
+WORKFLOW_MANIFEST = {
+    "chatentityworkflow": ("chat_entity", "ChatEntityWorkflow"),
+    "chatsummaryworkflow": ("chat_summary", "ChatSummaryWorkflow"),
+    "nriyv1workflow": ("nriy_v1", "NriyV1Workflow"),
+    "routerworkflow": ("router", "RouterWorkflow"),
+}
+
+# 한 번 불러온 workflow 클래스
+_loaded_workflows: Dict[str, Type] = {}
 
 def get_workflow(workflow_name: str) -> Any:
     """workflow 이름으로 workflow 클래스를 가져옵니다."""
-    if workflow_name not in workflow_registry:
+    if workflow_name not in WORKFLOW_MANIFEST:
         raise ValueError(f"Unknown workflow: {workflow_name}")
-    return workflow_registry[workflow_name]
+    if workflow_name not in _loaded_workflows:
+        module_name, class_name = WORKFLOW_MANIFEST[workflow_name]
+        module = timed_import(f".{module_name}", package=__package__)
+        _loaded_workflows[workflow_name] = getattr(module, class_name)
+    return _loaded_workflows[workflow_name]
 
 def get_all_workflows() -> Dict[str, Type]:
     """등록된 모든 workflow를 반환합니다."""
-    return workflow_registry
+    return {name: get_workflow(name) for name in WORKFLOW_MANIFEST}
@@ -0,0 +1,273 @@
+import os
+import asyncio
+from datetime import timedelta
+from typing import List, Dict, Any
+from temporalio import workflow
+
+from tpr_nriy.activities import run_activity
+from tpr_nriy.activities.check_response_needed import check_response_needed
+from tpr_nriy.activities.get_chat_history import get_chat_history
+from tpr_nriy.activities.add_chat_history import add_chat_history
+from tpr_nriy.activities.get_chat_summary import get_chat_summary
+from tpr_nriy.workflows.chat_summary import update_summary
+from tpr_nriy.workflows.nriy_v1 import NriyV1Workflow
+from tpr_nriy.workflows.router import (
+    ACTIVITY_RETRY_POLICY,
+    ACTIVITY_TIMEOUT,
+    CHAT_SUMMARY_ENABLED,
+    HISTORY_LIMIT,
+    NriyRouterInput,
+    NriyRouterOutput,
+    format_history,
+    parse_router_input,
+    split_history,
+)
+
+# 채팅 엔티티 workflow 설정
+# 이 시간 동안 메시지가 없으면 workflow를 종료합니다 (다음 메시지가 다시 시작합니다).
+CHAT_ENTITY_IDLE_TIMEOUT = timedelta(seconds=float(os.getenv("CHAT_ENTITY_IDLE_TIMEOUT", "1800")))
+# 이 수만큼 메시지를 처리하면 continue-as-new로 history를 비웁니다.
+CHAT_ENTITY_MAX_MESSAGES = int(os.getenv("CHAT_ENTITY_MAX_MESSAGES", "500"))
+# 응답이 필요한 메시지가 연달아 오면 이 시간(초) 동안 더 기다렸다가 한 번에 응답합니다 (0이면 사용 안 함).
+CHAT_DEBOUNCE_WINDOW = timedelta(seconds=float(os.getenv("CHAT_DEBOUNCE_WINDOW", "0")))
+# 첫 메시지 이후 최대 대기 시간(초)
+CHAT_DEBOUNCE_MAX_WAIT = timedelta(seconds=float(os.getenv("CHAT_DEBOUNCE_MAX_WAIT", "3")))
+
+class _Burst:
+    """Messages needing a reply that are answered by one generation pass."""
+
+    def __init__(self, started_at):
+        self.started_at = started_at
+        self.last_at = started_at
+        self.messages: List[NriyRouterInput] = []
+        self.reply: str | None = None
+        self.done = False
+
+@workflow.defn
+class ChatEntityWorkflow:
+    """
+    Long-running workflow owning one chat.
+
+    Messages arrive through the handle_message update (usually with
+    update-with-start from the trigger). The recent history window lives in
+    workflow state, so PocketBase is only read when the workflow starts,
+    and continue-as-new keeps the event history bounded. Bursts of messages
+    needing a reply can be debounced into one reply (CHAT_DEBOUNCE_WINDOW).
+    With CHAT_SUMMARY_ENABLED the chat summary is also kept in state and
+    updated in the background after replies.
+    """
+
+    def __init__(self) -> None:
+        self._logger = workflow.logger
+        self._history: List[Dict[str, Any]] = []
+        self._ready = False
+        self._handled = 0
+        self._burst: _Burst | None = None
+        self._summary = ""
+        self._summarizing = False
+
+    def _remember(self, message_id: str, user_name: str, message: str) -> None:
+        self._history = [{
+            "id": message_id,
+            "user_name": user_name,
+            "message": message
+        }] + self._history[:HISTORY_LIMIT - 1]
+
+    async def _add_chat_history(self, parsed_input: NriyRouterInput, message_id: str, user_name: str, message: str) -> str:
+        return await run_activity(
+            add_chat_history,
+            args=[message_id, parsed_input.chat_id, parsed_input.chat_name, user_name, message],
+            start_to_close_timeout=ACTIVITY_TIMEOUT,
+            retry_policy=ACTIVITY_RETRY_POLICY
+        )
+
+    def _recent_history(self) -> str:
+        return format_history(split_history(self._history)[0])
+
+    async def _update_summary(self, chat_id: str) -> None:
+        """Folds messages leaving the raw window into the summary (one update at a time)."""
+        try:
+            result = await update_summary(chat_id, split_history(self._history)[1])
+            self._summary = result["summary"]
+        except Exception as e:
+            self._logger.warning(f"Failed to update summary of chat {chat_id}: {e}")
+        finally:
+            self._summarizing = False
+
+    async def _generate_reply(self, history: str, parsed_input: NriyRouterInput) -> str | None:
+        # nriy_v1 returns None for messages it won't reply to (profanity)
+        return await workflow.execute_child_workflow(
+            NriyV1Workflow.run,
+            args=[history, parsed_input.message, None, self._summary or None],
+            id=f"nriy_v1-{parsed_input.message_id}",
+            task_queue="nriy"
+        )
+
+    async def _debounced_reply(self, parsed_input: NriyRouterInput) -> str | None:
+        """
+        Coalesces a burst of messages into a single generation pass.
+
+        The first message of a burst waits until no new message has arrived
+        for CHAT_DEBOUNCE_WINDOW, or until CHAT_DEBOUNCE_MAX_WAIT has passed
+        since it arrived, then generates one reply to the combined input.
+        Only the last message of the burst receives the reply.
+
+        Args:
+            parsed_input: Message needing a reply
+
+        Returns:
+            str | None: Reply for the last message of the burst, None for the
+                others or when nriy_v1 won't reply
+        """
+        burst = self._burst
+        leader = burst is None
+        if leader:
+            burst = self._burst = _Burst(workflow.now())
+        burst.messages.append(parsed_input)
+        burst.last_at = workflow.now()
+
+        if not leader:
+            await workflow.wait_condition(lambda: burst.done)
+            return burst.reply if burst.messages[-1] is parsed_input else None
+
+        try:
+            while True:
+                last_at = burst.last_at
+                deadline = min(last_at + CHAT_DEBOUNCE_WINDOW, burst.started_at + CHAT_DEBOUNCE_MAX_WAIT)
+                remaining = deadline - workflow.now()
+                if remaining <= timedelta(0):
+                    break
+                try:
+                    await workflow.wait_condition(lambda: burst.last_at != last_at, timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+            # Close the burst; later messages start a new one
+            self._burst = None
+            combined = burst.messages[-1].model_copy(update={
+                "message": "\n".join(message.message for message in burst.messages)
+            })
+            burst.reply = await self._generate_reply(self._recent_history(), combined)
+        finally:
+            self._burst = None if self._burst is burst else self._burst
+            burst.done = True
+
+        return burst.reply if burst.messages[-1] is parsed_input else None
+
+    @workflow.update
+    async def handle_message(self, input: str) -> Dict:
+        """
+        Records a chat message and replies to it if needed.
+
+        Args:
+            input: Input data from chat (same JSON as RouterWorkflow)
+
+        Returns:
+            Dict: NriyRouterOutput
+        """
+        await workflow.wait_condition(lambda: self._ready)
+        parsed_input = parse_router_input(input)
+
+        # History order follows update order, before any await
+        self._remember(parsed_input.message_id, parsed_input.user_name, parsed_input.message)
+        history = self._recent_history()
+
+        add_task = asyncio.create_task(self._add_chat_history(
+            parsed_input,
+            parsed_input.message_id,
+            parsed_input.user_name,
+            parsed_input.message
+        ))
+        try:
+            needs_response = await run_activity(
+                check_response_needed,
+                args=[parsed_input.message],
+                start_to_close_timeout=ACTIVITY_TIMEOUT,
+                retry_policy=ACTIVITY_RETRY_POLICY
+            )
+
+            reply = None
+            if needs_response and CHAT_DEBOUNCE_WINDOW > timedelta(0):
+                reply = await self._debounced_reply(parsed_input)
+            elif needs_response:
+                reply = await self._generate_reply(history, parsed_input)
+
+            await add_task
+        finally:
+            self._handled += 1
+
+        if reply is None:
+            return NriyRouterOutput(doReply=False, message=None).model_dump()
+
+        reply_id = f"msg-{workflow.now().timestamp()}"
+        self._remember(reply_id, "Assistant", reply)
+        await self._add_chat_history(parsed_input, reply_id, "Assistant", reply)
+
+        # Update the summary in the background; the reply does not wait for it
+        if CHAT_SUMMARY_ENABLED and not self._summarizing and split_history(self._history)[1]:
+            self._summarizing = True
+            asyncio.create_task(self._update_summary(parsed_input.chat_id))
+
+        return NriyRouterOutput(doReply=True, message=reply).model_dump()
+
+    @workflow.run
+    async def run(
+        self,
+        chat_id: str,
+        history: List[Dict[str, Any]] | None = None,
+        summary: str | None = None
+    ) -> None:
+        """
+        Owns a chat until it has been idle for CHAT_ENTITY_IDLE_TIMEOUT.
+
+        Args:
+            chat_id: Chat ID
+            history: History window carried over by continue-as-new
+            summary: Chat summary carried over by continue-as-new
+        """
+        if summary is None and CHAT_SUMMARY_ENABLED:
+            summary = (await run_activity(
+                get_chat_summary,
+                args=[chat_id],
+                start_to_close_timeout=ACTIVITY_TIMEOUT,
+                retry_policy=ACTIVITY_RETRY_POLICY
+            ))["summary"]
+        self._summary = summary or ""
+
+        if history is None:
+            history = await run_activity(
+                get_chat_history,
+                args=[chat_id, HISTORY_LIMIT],
+                start_to_close_timeout=ACTIVITY_TIMEOUT,
+                retry_policy=ACTIVITY_RETRY_POLICY
+            )
+            history = [
+                {
+                    "id": message.get("id"),
+                    "user_name": message.get("user_name", ""),
+                    "message": message.get("message", "")
+                }
+                for message in history
+            ]
+        self._history = history[:HISTORY_LIMIT]
+        self._ready = True
+
+        while True:
+            handled = self._handled
+            try:
+                await workflow.wait_condition(
+                    lambda: self._handled != handled
+                    or self._handled >= CHAT_ENTITY_MAX_MESSAGES
+                    or workflow.info().is_continue_as_new_suggested(),
+                    timeout=CHAT_ENTITY_IDLE_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                # Idle: finish once no update is in progress
+                if workflow.all_handlers_finished() and not self._summarizing:
+                    self._logger.info(f"Chat {chat_id} idle, closing entity workflow")
+                    return
+                continue
+
+            if self._handled >= CHAT_ENTITY_MAX_MESSAGES or workflow.info().is_continue_as_new_suggested():
+                await workflow.wait_condition(lambda: workflow.all_handlers_finished() and not self._summarizing)
+                workflow.continue_as_new(args=[chat_id, self._history, self._summary])
@@ -0,0 +1,76 @@
+from datetime import timedelta
+from typing import Any, Dict, List
+from temporalio import workflow
+from temporalio.common import RetryPolicy
+from temporalio.exceptions import WorkflowAlreadyStartedError
+
+from tpr_nriy.activities import run_activity
+from tpr_nriy.activities.update_chat_summary import update_chat_summary
+
+ACTIVITY_TIMEOUT = timedelta(seconds=60)
+ACTIVITY_RETRY_POLICY = RetryPolicy(
+    initial_interval=timedelta(seconds=1),
+    maximum_interval=timedelta(seconds=30),
+    maximum_attempts=3
+)
+
+def summary_messages(history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keeps only the fields update_chat_summary needs from history messages."""
+    return [
+        {
+            "id": message.get("id"),
+            "user_name": message.get("user_name", ""),
+            "message": message.get("message", "")
+        }
+        for message in history
+    ]
+
+async def update_summary(chat_id: str, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Runs update_chat_summary from a workflow."""
+    return await run_activity(
+        update_chat_summary,
+        args=[chat_id, summary_messages(messages)],
+        start_to_close_timeout=ACTIVITY_TIMEOUT,
+        retry_policy=ACTIVITY_RETRY_POLICY
+    )
+
+async def start_summary_update(chat_id: str, messages: List[Dict[str, Any]]) -> None:
+    """
+    Starts ChatSummaryWorkflow for a chat without waiting for it.
+
+    The child outlives the calling workflow (ABANDON), so the reply is not
+    delayed. Only one runs per chat; while one is running new requests are
+    skipped, and the next reply picks up the messages they would have added.
+
+    Args:
+        chat_id: Chat ID
+        messages: Messages older than the raw history window, newest first
+    """
+    if not messages:
+        return
+    try:
+        await workflow.start_child_workflow(
+            ChatSummaryWorkflow.run,
+            args=[chat_id, summary_messages(messages)],
+            id=f"chat_summary-{chat_id}",
+            task_queue="nriy",
+            parent_close_policy=workflow.ParentClosePolicy.ABANDON
+        )
+    except WorkflowAlreadyStartedError:
+        pass
+
+@workflow.defn
+class ChatSummaryWorkflow:
+    """Folds messages leaving the raw history window into the chat's rolling summary."""
+
+    @workflow.run
+    async def run(self, chat_id: str, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Args:
+            chat_id: Chat ID
+            messages: Messages older than the raw history window, newest first
+
+        Returns:
+            Dict[str, Any]: Updated summary and last_message_id
+        """
+        return await update_summary(chat_id, messages)
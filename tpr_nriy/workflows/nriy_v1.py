@@ -1,117 +1,159 @@
 from typing import Dict, Any
 import asyncio
+from datetime import timedelta
 from pydantic import BaseModel
 from temporalio import workflow
-from temporalio.workflow import execute_activity
 
+from tpr_nriy.activities import run_activity
+from tpr_nriy.common.config import env_flag
 from tpr_nriy.activities.analyze_message import analyze_message
 from tpr_nriy.activities.analyze_context import analyze_context
 from tpr_nriy.activities.search_naver import search_naver
+from tpr_nriy.activities.pack_context import pack_context
 from tpr_nriy.activities.generate_response import generate_response
 
+# analyze_message와 analyze_context(및 검색)를 동시에 실행할지 여부의 기본값.
+# 토큰 일부를 낭비하는 대신 LLM 왕복 한 번만큼 지연을 줄입니다.
+SPECULATIVE_ANALYSIS = env_flag("NRIY_SPECULATIVE_ANALYSIS")
+
+ACTIVITY_TIMEOUT = timedelta(seconds=30)
+# 투기적으로 실행해 취소될 수 있는 activity의 heartbeat 간격 한도.
+# worker는 heartbeat 응답으로 취소를 전달받습니다 (TracingInterceptor가 heartbeat를 보냅니다).
+HEARTBEAT_TIMEOUT = timedelta(seconds=10)
+
 class NriyV1Input(BaseModel):
     history: str
     input: str
     channel_id: str
 
-class NriyV1Output(BaseModel):
-    do_reply: bool
-    reply_message: str | None = None
-
 @workflow.defn
 class NriyV1Workflow:
     def __init__(self) -> None:
         self._logger = workflow.logger
 
+    async def _analyze_and_search(self, history: str, message: str) -> Dict[str, Any]:
+        """
+        Analyzes the context, runs the suggested searches and packs their
+        deduplicated, best-ranked results into the context token budget.
+
+        Args:
+            history: Chat history
+            message: Current message
+
+        Returns:
+            Dict[str, Any]: Search contexts keyed by search type
+        """
+        # Analyze context
+        context_analysis = await run_activity(
+            analyze_context,
+            args=[history, message],
+            start_to_close_timeout=ACTIVITY_TIMEOUT,
+            heartbeat_timeout=HEARTBEAT_TIMEOUT
+        )
+
+        # Perform searches concurrently
+        search_types = [
+            search_type
+            for search_type in ("news", "blog", "web")
+            if context_analysis[f"{search_type}_search"]
+        ]
+        search_results = await asyncio.gather(*(
+            run_activity(
+                search_naver,
+                args=[search_type, context_analysis["query_string"]],
+                start_to_close_timeout=ACTIVITY_TIMEOUT,
+                heartbeat_timeout=HEARTBEAT_TIMEOUT
+            )
+            for search_type in search_types
+        ))
+
+        if not search_types:
+            return {}
+
+        # Dedupe and rank across search types, keeping what fits in the budget
+        return await run_activity(
+            pack_context,
+            args=[context_analysis["query_string"], message, dict(zip(search_types, search_results))],
+            start_to_close_timeout=ACTIVITY_TIMEOUT
+        )
+
     @workflow.run
-    async def run(self, history: str, message: str) -> str:
+    async def run(
+        self,
+        history: str,
+        message: str,
+        speculative: bool | None = None,
+        summary: str | None = None
+    ) -> str | None:
         """
         Main workflow for processing messages and generating responses.
-        
+
         Args:
-            history: Chat history
+            history: Chat history (recent messages)
             message: Current message
-        
+            speculative: Run the profanity check and context analysis/searches
+                concurrently, discarding the latter if the check fails
+                (default: NRIY_SPECULATIVE_ANALYSIS)
+            summary: Rolling summary of the conversation before history
+
         Returns:
-            str: Generated response
+            str | None: Generated response, or None when the message should
+                not be replied to (profanity)
         """
+        if speculative is None:
+            speculative = SPECULATIVE_ANALYSIS
+
+        # Context analysis sees the summary followed by the recent messages
+        chat_history = history
+        if summary:
+            chat_history = f"[Summary of earlier conversation]\n{summary}\n\n{history}"
+
+        search_task = None
+        if speculative:
+            search_task = asyncio.create_task(self._analyze_and_search(chat_history, message))
+
         # Analyze message
-        message_analysis = await execute_activity(
+        message_analysis = await run_activity(
             analyze_message,
-            message,
-            start_to_close_timeout=30
+            args=[message],
+            start_to_close_timeout=ACTIVITY_TIMEOUT
         )
-        
+
         if message_analysis["uses_profanity"]:
             self._logger.info("Message contains profanity, stopping workflow")
-            return NriyV1Output(do_reply=False)
-        
+            if search_task is not None:
+                # Cancels the in-flight context analysis and searches; the worker
+                # stops those activities at their next heartbeat
+                search_task.cancel()
+            return None
+
         # Get current context
         now_context = "현재 시간: " + workflow.now().isoformat()
-        
-        # Analyze context
-        context_analysis = await execute_activity(
-            analyze_context,
-            history,
-            message,
-            start_to_close_timeout=30
-        )
-        
-        # Prepare contexts
+
+        # Analyze context and search (already running in speculative mode)
+        if search_task is None:
+            search_contexts = await self._analyze_and_search(chat_history, message)
+        else:
+            search_contexts = await search_task
+
+        # Prepare contexts. The recent messages are already in the prompt, so
+        # "Past Conversation" only carries the summary of older messages.
         contexts = {
             "now": {"context": now_context},
-            "history": {"context": history}
+            **({"history": {"context": summary}} if summary else {}),
+            **search_contexts
         }
-        
-        # Perform searches concurrently
-        search_tasks = []
-        if context_analysis["news_search"]:
-            search_tasks.append(execute_activity(
-                search_naver,
-                "news",
-                context_analysis["query_string"],
-                start_to_close_timeout=30
-            ))
-        
-        if context_analysis["blog_search"]:
-            search_tasks.append(execute_activity(
-                search_naver,
-                "blog",
-                context_analysis["query_string"],
-                start_to_close_timeout=30
-            ))
-        
-        if context_analysis["web_search"]:
-            search_tasks.append(execute_activity(
-                search_naver,
-                "web",
-                context_analysis["query_string"],
-                start_to_close_timeout=30
-            ))
-        
-        # Wait for all searches to complete
-        search_results = await asyncio.gather(*search_tasks)
-        
-        # Add results to contexts
-        result_index = 0
-        if context_analysis["news_search"]:
-            contexts["news"] = {"context": search_results[result_index]}
-            result_index += 1
-        
-        if context_analysis["blog_search"]:
-            contexts["blog"] = {"context": search_results[result_index]}
-            result_index += 1
-        
-        if context_analysis["web_search"]:
-            contexts["web"] = {"context": search_results[result_index]}
-        
+
         # Generate response
-        response = await execute_activity(
+        response = await run_activity(
             generate_response,
-            history,
-            message,
-            contexts,
-            start_to_close_timeout=30
+            args=[history, message, contexts],
+            start_to_close_timeout=ACTIVITY_TIMEOUT
         )
-        
-        return response 
\ No newline at end of file
+        usage = response["usage"]
+        self._logger.info(
+            f"generate_response used {usage['prompt_tokens']} prompt tokens "
+            f"({usage['prompt_sections']}) and {usage['completion_tokens']} completion tokens"
+        )
+
+        return response["response"]
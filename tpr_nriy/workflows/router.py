@@ -1,13 +1,34 @@
 from datetime import timedelta
+import os
 import json
 from pydantic import BaseModel
 from temporalio import workflow
 from temporalio.common import RetryPolicy
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 
+from tpr_nriy.activities import run_activity
+from tpr_nriy.common.config import env_flag
 from tpr_nriy.activities.check_response_needed import check_response_needed
 from tpr_nriy.activities.get_chat_history import get_chat_history
 from tpr_nriy.activities.add_chat_history import add_chat_history
+from tpr_nriy.activities.get_chat_summary import get_chat_summary
+from tpr_nriy.workflows.chat_summary import start_summary_update
+from tpr_nriy.workflows.nriy_v1 import NriyV1Workflow
+from tpr_nriy.workflows.stages import StageGraph
+
+HISTORY_LIMIT = 15
+
+# 채팅별 요약 사용 여부. 켜면 응답 생성에는 요약과 최근 CHAT_SUMMARY_RECENT_MESSAGES개의
+# 메시지만 넣고, 응답 후 그보다 오래된 메시지를 요약에 반영합니다 (chat_summaries collection 필요).
+CHAT_SUMMARY_ENABLED = env_flag("CHAT_SUMMARY_ENABLED")
+CHAT_SUMMARY_RECENT_MESSAGES = int(os.getenv("CHAT_SUMMARY_RECENT_MESSAGES", "6"))
+
+ACTIVITY_TIMEOUT = timedelta(seconds=10)
+ACTIVITY_RETRY_POLICY = RetryPolicy(
+    initial_interval=timedelta(seconds=1),
+    maximum_interval=timedelta(seconds=10),
+    maximum_attempts=3
+)
 
 class NriyRouterInput(BaseModel):
     message_id: str
@@ -18,119 +39,189 @@ class NriyRouterInput(BaseModel):
 
 class NriyRouterOutput(BaseModel):
     doReply: bool
-    message: str
+    message: str | None
+
+def parse_router_input(input: str) -> NriyRouterInput:
+    """
+    Parse input data to NriyRouterInput.
+
+    Args:
+        input: Input data from chat (JSON)
+
+    Returns:
+        NriyRouterInput: Parsed input data
+    """
+    input = json.loads(input)
+    return NriyRouterInput(
+        message_id=input["logId"],
+        chat_id=input["channelId"],
+        chat_name=input["room"],
+        user_name=input["author"]["name"],
+        message=input["content"]
+    )
+
+def format_history(history: List[Dict[str, Any]]) -> str:
+    """
+    Formats chat history as text, oldest first.
+
+    Args:
+        history: Messages, newest first
+
+    Returns:
+        str: One "user: message" line per message
+    """
+    return "\n".join(
+        f"{message.get('user_name', '')}: {message.get('message', '')}"
+        for message in reversed(history)
+    )
+
+def split_history(history: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Splits history into the raw window given to the LLM and the older
+    messages covered by the chat summary.
+
+    Args:
+        history: Messages, newest first
+
+    Returns:
+        Tuple: (recent messages, older messages), both newest first. Without
+            CHAT_SUMMARY_ENABLED the whole history is recent.
+    """
+    if not CHAT_SUMMARY_ENABLED:
+        return history, []
+    return history[:CHAT_SUMMARY_RECENT_MESSAGES], history[CHAT_SUMMARY_RECENT_MESSAGES:]
 
 @workflow.defn
 class RouterWorkflow:
-    def _parse_input(self, input: str) -> NriyRouterInput:
+    def _with_message(self, parsed_input: NriyRouterInput, history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Parse input data to NriyRouterInput.
-        
+        Returns the history including the incoming message.
+
+        The message is added locally when the history read ran before (or
+        without seeing) its write.
+
         Args:
-            input: Input data from chat
-            
+            parsed_input: Current message
+            history: Messages from get_chat_history, newest first
+
         Returns:
-            NriyRouterInput: Parsed input data
+            List[Dict[str, Any]]: Messages, newest first
         """
-        input = json.loads(input)
-        return NriyRouterInput(
-            message_id=input["logId"],
-            chat_id=input["channelId"],
-            chat_name=input["room"],
-            user_name=input["author"]["name"],
-            message=input["content"]
+        if not any(message.get("id") == parsed_input.message_id for message in history):
+            history = [{
+                "id": parsed_input.message_id,
+                "user_name": parsed_input.user_name,
+                "message": parsed_input.message
+            }] + history[:HISTORY_LIMIT - 1]
+
+        return history
+
+    async def _add_chat_history(self, parsed_input: NriyRouterInput, message_id: str, user_name: str, message: str) -> str:
+        return await run_activity(
+            add_chat_history,
+            args=[message_id, parsed_input.chat_id, parsed_input.chat_name, user_name, message],
+            start_to_close_timeout=ACTIVITY_TIMEOUT,
+            retry_policy=ACTIVITY_RETRY_POLICY
         )
 
     @workflow.run
-    async def run(self, input: Dict[str, Any]) -> Dict:
+    async def run(self, input: str) -> Dict:
         # Parse input
-        parsed_input = self._parse_input(input)
+        parsed_input = parse_router_input(input)
 
-        # Add response to PocketBase
-        await workflow.execute_activity(
-            add_chat_history,
-            {
-                "message_id": parsed_input.message_id,
-                "chat_id": parsed_input.chat_id,
-                "chat_name": parsed_input.chat_name,
-                "user_name": parsed_input.user_name,
-                "message": parsed_input.message
-            },
-            start_to_close_timeout=timedelta(seconds=10),
-            retry_policy=RetryPolicy(
-                initial_interval=timedelta(seconds=1),
-                maximum_interval=timedelta(seconds=10),
-                maximum_attempts=3
+        # Stages run as soon as their dependencies finish. For messages that
+        # need no reply only add_message and needs_response run, concurrently.
+        graph = StageGraph()
+        graph.add(
+            "add_message",
+            lambda _: self._add_chat_history(
+                parsed_input,
+                parsed_input.message_id,
+                parsed_input.user_name,
+                parsed_input.message
             )
         )
-
-        # Get existing chat history
-        history = await workflow.execute_activity(
-            get_chat_history,
-            {
-                "chat_id": parsed_input.chat_id,
-                "limit": 15
-            },
-            start_to_close_timeout=timedelta(seconds=10),
-            retry_policy=RetryPolicy(
-                initial_interval=timedelta(seconds=1),
-                maximum_interval=timedelta(seconds=10),
-                maximum_attempts=3
+        graph.add(
+            "needs_response",
+            lambda _: run_activity(
+                check_response_needed,
+                args=[parsed_input.message],
+                start_to_close_timeout=ACTIVITY_TIMEOUT,
+                retry_policy=ACTIVITY_RETRY_POLICY
             )
         )
-
-        # Check if response is needed
-        needs_response = await workflow.execute_activity(
-            check_response_needed,
-            {
-                "message": parsed_input.message,
-                "chat_history": history,
-                "last_response_time": None
-            },
-            start_to_close_timeout=timedelta(seconds=10),
-            retry_policy=RetryPolicy(
-                initial_interval=timedelta(seconds=1),
-                maximum_interval=timedelta(seconds=10),
-                maximum_attempts=3
-            )
+        graph.add(
+            "history",
+            lambda _: run_activity(
+                get_chat_history,
+                args=[parsed_input.chat_id, HISTORY_LIMIT],
+                start_to_close_timeout=ACTIVITY_TIMEOUT,
+                retry_policy=ACTIVITY_RETRY_POLICY
+            ),
+            deps=["needs_response"],
+            when=lambda results: results["needs_response"]
         )
-
-        if needs_response:
+        graph.add(
+            "summary",
+            lambda _: run_activity(
+                get_chat_summary,
+                args=[parsed_input.chat_id],
+                start_to_close_timeout=ACTIVITY_TIMEOUT,
+                retry_policy=ACTIVITY_RETRY_POLICY
+            ),
+            deps=["needs_response"],
+            when=lambda results: results["needs_response"] and CHAT_SUMMARY_ENABLED
+        )
+        graph.add(
+            "reply",
             # Generate response using nriy_v1 workflow
-            response = await workflow.execute_child_workflow(
-                "nriy_v1",
-                {
-                    "message": parsed_input.message,
-                    "chat_history": history,
-                    "user_name": parsed_input.user_name
-                },
+            lambda results: workflow.execute_child_workflow(
+                NriyV1Workflow.run,
+                args=[
+                    format_history(split_history(self._with_message(parsed_input, results["history"]))[0]),
+                    parsed_input.message,
+                    None,
+                    results["summary"]["summary"] if results["summary"] else None
+                ],
                 id=f"nriy_v1-{parsed_input.message_id}",
                 task_queue="nriy"
-            )
-
+            ),
+            deps=["history", "summary"],
+            when=lambda results: results["needs_response"]
+        )
+        graph.add(
+            "add_reply",
             # Add response to PocketBase
-            await workflow.execute_activity(
-                add_chat_history,
-                {
-                    "message_id": f"msg-{workflow.now().timestamp()}",
-                    "chat_id": parsed_input.chat_id,
-                    "chat_name": parsed_input.chat_name,
-                    "user_name": "Assistant",
-                    "message": response["response"]
-                },
-                start_to_close_timeout=timedelta(seconds=10),
-                retry_policy=RetryPolicy(
-                    initial_interval=timedelta(seconds=1),
-                    maximum_interval=timedelta(seconds=10),
-                    maximum_attempts=3
-                )
-            )
+            lambda results: self._add_chat_history(
+                parsed_input,
+                f"msg-{workflow.now().timestamp()}",
+                "Assistant",
+                results["reply"]
+            ),
+            deps=["reply", "add_message"],
+            when=lambda results: results["reply"] is not None
+        )
+        graph.add(
+            "update_summary",
+            # Fold messages leaving the raw window into the summary, without waiting for it
+            lambda results: start_summary_update(
+                parsed_input.chat_id,
+                split_history(self._with_message(parsed_input, results["history"]))[1]
+            ),
+            deps=["add_reply"],
+            when=lambda results: results["reply"] is not None and CHAT_SUMMARY_ENABLED
+        )
+        results = await graph.run()
 
+        # nriy_v1 returns None for messages it won't reply to (profanity);
+        # reply is also None (SKIPPED) when no response was needed
+        reply = results["reply"]
+        if reply is not None:
             return NriyRouterOutput(
                 doReply=True,
-                message=response["response"]
+                message=reply
             ).model_dump()
-        
+
         return NriyRouterOutput(
             doReply=False,
             message=None
@@ -0,0 +1,70 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable
+
+# stage 결과가 없을 때(조건 불충족으로 건너뜀) 사용하는 값
+SKIPPED = None
+
+class StageGraph:
+    """
+    Small dependency graph of workflow stages.
+
+    Every stage starts as soon as all of its dependencies have finished, so
+    independent stages run concurrently. A stage whose condition returns
+    False is skipped (its result is SKIPPED) without scheduling anything.
+
+    Tasks are created in insertion order and only awaited through gather,
+    which keeps scheduling deterministic inside a Temporal workflow.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, tuple] = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[[Dict[str, Any]], Awaitable[Any]],
+        deps: Iterable[str] = (),
+        when: Callable[[Dict[str, Any]], bool] | None = None
+    ) -> "StageGraph":
+        """
+        Adds a stage.
+
+        Args:
+            name: Stage name
+            fn: Coroutine function receiving the results of finished stages
+            deps: Names of stages that must finish first
+            when: Condition evaluated on those results; False skips the stage
+
+        Returns:
+            StageGraph: self, for chaining
+        """
+        deps = tuple(deps)
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Unknown stage dependency: {dep}")
+        self._stages[name] = (fn, deps, when)
+        return self
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Runs all stages.
+
+        Returns:
+            Dict[str, Any]: Results keyed by stage name
+        """
+        results: Dict[str, Any] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str) -> None:
+            fn, deps, when = self._stages[name]
+            if deps:
+                await asyncio.gather(*(tasks[dep] for dep in deps))
+            if when is not None and not when(results):
+                results[name] = SKIPPED
+                return
+            results[name] = await fn(results)
+
+        for name in self._stages:
+            tasks[name] = asyncio.create_task(run_stage(name))
+        await asyncio.gather(*tasks.values())
+        return results